@@ -22,12 +22,23 @@ logger.setLevel(settings.app.loglevel)
 
 
 class ProxyLinker:
-    def __init__(self, batch: list[Job]):
+    def __init__(self, batch: list[Job], drafts: bool = False):
+        """
+        Link finished proxies to their media pool items
+
+        Args:
+            batch (list[Job]): Jobs with finished proxies to link
+            drafts (bool, optional): Link draft proxies. Drafts are best
+                effort: missing drafts are skipped and failing to link
+                them all isn't fatal. Defaults to False.
+        """
         self.jobs = batch
+        self.drafts = drafts
         self.project_name = self.jobs[0].project.project_name
 
         self.link_success = []
         self.mismatch_fail = []
+        self.missing_fail = []
 
     def project_is_same(self):
         """
@@ -90,18 +101,58 @@ class ProxyLinker:
         if not media_pool_item.link_proxy(proxy_media_path):
             raise exceptions.ResolveLinkMismatchError(proxy_file=proxy_media_path)
 
+    def link_job(self, job: Job):
+        """
+        Link a job's proxy to its media pool item, recording the outcome
+
+        Missing proxies and link mismatches are logged, so the rest of
+        the batch still links.
+        """
+
+        mpi = media_pool_index.lookup(job.source.media_pool_id)
+
+        try:
+            self.single_link(mpi, job.output_file_path)
+
+        except FileNotFoundError:
+            # The queuer reports failed encodes, link the rest
+            logger.error(
+                f"[red bold]:x: No proxy to link for '{job.source.file_name}'[/]"
+            )
+            self.missing_fail.append(job)
+
+        except exceptions.ResolveLinkMismatchError:
+            show_exception = False
+            if logger.getEffectiveLevel() <= 10:
+                show_exception = True
+
+            logger.error(
+                f"[red bold]:x: Failed to link '{job.source.file_name}'[/]\n" f"[red]",
+                exc_info=show_exception,
+            )
+            self.mismatch_fail.append(job)
+
+        else:
+            logger.info(f"[green bold]:heavy_check_mark: Linked\n")
+            self.link_success.append(job)
+
     def batch_link(self):
         """
         Iterate through media list and link each finished proxy with its media pool item.
         """
 
-        logger.info(f"[cyan]Linking {len(self.jobs)} proxies[/]")
+        kind = "drafts" if self.drafts else "proxies"
+        logger.info(f"[cyan]Linking {len(self.jobs)} {kind}[/]")
 
         if not self.project_is_same():
             core.app_exit(1, -1)
 
         self.remove_unlinkable_jobs()
 
+        # Failed drafts are replaced by their full quality proxy later
+        if self.drafts:
+            self.jobs = [x for x in self.jobs if os.path.exists(x.output_file_path)]
+
         # Iterate through all available proxies
         for job in self.jobs:
             logger.debug(
@@ -109,34 +160,18 @@ class ProxyLinker:
             )
             logger.info(f"[cyan]:link: '{job.source.file_name}'")
 
-            mpi = media_pool_index.lookup(job.source.media_pool_id)
-
-            try:
-                self.single_link(mpi, job.output_file_path)
-
-            except exceptions.ResolveLinkMismatchError:
-                show_exception = False
-                if logger.getEffectiveLevel() <= 10:
-                    show_exception = True
-
-                logger.error(
-                    f"[red bold]:x: Failed to link '{job.source.file_name}'[/]\n"
-                    f"[red]",
-                    exc_info=show_exception,
-                )
-                self.mismatch_fail.append(job)
-
-            else:
-                logger.info(f"[green bold]:heavy_check_mark: Linked\n")
-                self.link_success.append(job)
+            self.link_job(job)
 
         if self.link_success:
             logger.debug(f"[magenta]Total link success:[/] {len(self.link_success)}")
 
+        if self.missing_fail:
+            logger.error(f"[red]{len(self.missing_fail)} {kind} were never encoded!")
+
         if self.mismatch_fail:
-            logger.error(f"[red]{len(self.mismatch_fail)} proxies failed to link!")
+            logger.error(f"[red]{len(self.mismatch_fail)} {kind} failed to link!")
 
-            if len(self.mismatch_fail) == len(self.jobs):
+            if len(self.mismatch_fail) == len(self.jobs) and not self.drafts:
                 logger.critical(
                     "[red bold]Oh dear. All the proxies failed to link.[/]\n"
                     "[red]Resolve might not like your encoding settings or something else is wrong.[/]\n",
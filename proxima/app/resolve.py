@@ -1,5 +1,6 @@
 import logging
 import os
+import re
 
 from pydavinci import davinci
 from pydavinci.wrappers.mediapoolitem import MediaPoolItem
@@ -10,7 +11,13 @@ from pydavinci.wrappers.timelineitem import TimelineItem
 from proxima.app import core
 from proxima.settings.manager import Settings, settings
 from proxima.types.batch import Batch
-from proxima.types.job import Job, ProjectMetadata, SourceMetadata
+from proxima.types.job import (
+    Job,
+    Playhead,
+    ProjectMetadata,
+    SourceMetadata,
+    TimelineUsage,
+)
 from proxima.types.media_pool_index import media_pool_index
 
 resolve = davinci.Resolve()
@@ -44,6 +51,84 @@ def get_timeline_items(timeline: Timeline) -> list[TimelineItem]:
     return all_track_items
 
 
+def get_timeline_usage(timeline: Timeline) -> dict[str, list[TimelineUsage]]:
+    """
+    Get where each media pool item is used on the timeline video tracks
+
+    Args:
+        timeline (Timeline): Provided DaVinci Resolve timeline object
+
+    Returns:
+        dict[str, list[TimelineUsage]]: Usages by media pool item ID
+    """
+
+    logger.info("[cyan]Getting timeline usage...")
+
+    usage: dict[str, list[TimelineUsage]] = {}
+
+    for track_index in range(1, timeline.track_count("video") + 1):
+        for item in timeline.items("video", track_index):
+            # Items without mediapoolitems raise a TypeError on access
+            try:
+                media_id = item.mediapoolitem.media_id
+            except TypeError:
+                continue
+
+            usage.setdefault(media_id, []).append(
+                TimelineUsage(
+                    track=track_index,
+                    record_start=item.start,
+                    record_end=item.end,
+                    source_start=item.left_offset,
+                    source_end=item.left_offset + item.duration,
+                )
+            )
+
+    return usage
+
+
+def get_playhead(
+    timeline: Timeline, timeline_usage: dict[str, list[TimelineUsage]]
+) -> Playhead | None:
+    """
+    Get the playhead position and the track of the video item under it
+
+    Args:
+        timeline (Timeline): Provided DaVinci Resolve timeline object
+        timeline_usage (dict[str, list[TimelineUsage]]): Timeline usages
+            by media pool item ID
+
+    Returns:
+        Playhead | None: Playhead record frame, timeline framerate and
+            active track, None if the playhead can't be read
+    """
+
+    try:
+        fps = float(str(timeline.get_setting("timelineFrameRate")).split()[0])
+        hours, minutes, seconds, frames = [
+            int(x) for x in re.split("[:;]", timeline.timecode)
+        ]
+    except Exception as e:
+        logger.warning(f"[yellow]Couldn't get playhead position: {e}")
+        return None
+
+    # Timecode counts nominal rate frames, close enough for drop frame
+    frame = ((hours * 60 + minutes) * 60 + seconds) * round(fps) + frames
+
+    # The current video item's track is the active track
+    track = None
+    try:
+        item = timeline.current_video_item
+        for usage in timeline_usage.get(item.mediapoolitem.media_id, []):
+            if usage.record_start == item.start:
+                track = usage.track
+    except Exception:
+        logger.debug("[magenta] * No video item under the playhead")
+
+    logger.debug(f"[magenta] * Playhead at frame {frame}, track {track}")
+    return Playhead(frame=frame, fps=fps, track=track)
+
+
 def get_media_pool_items(timeline_items: list[TimelineItem]) -> list[MediaPoolItem]:
     """
     Get media pool items from timeline items.
@@ -163,9 +248,15 @@ def filter_queueable(media_pool_items: list[MediaPoolItem]) -> list[MediaPoolIte
     return media_pool_items
 
 
-def generate_batch(media_pool_items: list[MediaPoolItem], settings: Settings) -> Batch:
+def generate_batch(
+    media_pool_items: list[MediaPoolItem],
+    settings: Settings,
+    timeline_usage: dict[str, list[TimelineUsage]] | None = None,
+) -> Batch:
     logger.info("[cyan]Generating batch of jobs...")
 
+    timeline_usage = timeline_usage or {}
+
     job_list = []
     for mpi in media_pool_items:
         global media_pool_index
@@ -193,6 +284,7 @@ def generate_batch(media_pool_items: list[MediaPoolItem], settings: Settings) ->
             proxy_status=props["Proxy"],
             proxy_media_path=props["Proxy Media Path"],
             media_pool_id=mpi.media_id,
+            usages=timeline_usage.get(mpi.media_id, []),
         )
 
         job_list.append(Job(project_metadata, source_metadata, settings))
@@ -0,0 +1,248 @@
+# Order jobs for submission
+
+import logging
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from proxima.app import core
+
+if TYPE_CHECKING:
+    from proxima.settings.manager import Priority
+    from proxima.types.job import Playhead
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+
+class QueueOrder(str, Enum):
+    """Orders jobs can be submitted in"""
+
+    timeline = "timeline"
+    lpt = "lpt"
+    spt = "spt"
+
+
+# Redis consumes lower priorities first: 0 is most urgent, 9 background
+PRIORITY_STEPS = list(range(10))
+BACKGROUND_PRIORITY = PRIORITY_STEPS[-1]
+INTERACTIVE_PRIORITIES = range(PRIORITY_STEPS[0], BACKGROUND_PRIORITY)
+
+# With drafts, every draft lane is ahead of every full quality lane
+DRAFT_PRIORITIES = range(INTERACTIVE_PRIORITIES.start, 4)
+FULL_PRIORITIES = range(DRAFT_PRIORITIES.stop, INTERACTIVE_PRIORITIES.stop)
+
+# For tasks without a priority, which Redis treats as most urgent
+DEFAULT_PRIORITY = 4
+
+
+# Relative decode cost per source pixel, by the codec name probes
+# report. Long-GOP and high bit depth codecs cost the most.
+DECODE_COSTS = {
+    "mjpeg": 0.4,
+    "dnxhd": 0.5,
+    "prores": 0.5,
+    "cfhd": 0.6,
+    "mpeg2video": 0.6,
+    "h264": 1.0,
+    "vp9": 1.4,
+    "hevc": 1.6,
+    "av1": 2.0,
+    "png": 1.2,
+    "dpx": 0.8,
+    "exr": 2.0,
+}
+
+# Relative encode cost per output pixel, by FFmpeg encoder name
+ENCODE_COSTS = {
+    "dnxhd": 0.3,
+    "mjpeg": 0.3,
+    "prores": 0.4,
+    "prores_ks": 0.5,
+    "libx264": 1.0,
+    "h264_nvenc": 0.2,
+    "libx265": 3.0,
+    "hevc_nvenc": 0.3,
+}
+
+# Remuxed jobs only copy, costing about as much as reading the source
+REMUX_COST = 0.02
+
+# Black fill is nearly free to encode
+FILL_COST = 0.05
+
+
+def get_encoded_frames(job: dict) -> float:
+    """Frames the job encodes, weighting trim-aware fill by its cost"""
+
+    chunks = job["job"]["chunks"]
+    if not chunks:
+        return job["source"]["frames"]
+
+    return sum(
+        (x["end_frame"] - x["start_frame"]) * (FILL_COST if x["fill"] else 1)
+        for x in chunks
+    )
+
+
+def get_job_cost(job: dict) -> float:
+    """
+    Estimate a job's encode work in megapixel-equivalents
+
+    Decoding every source frame costs its pixel count by the source
+    codec's relative decode cost. Each output preset adds its scaled
+    pixel count by its encoder's relative cost. Unknown codecs cost 1.
+
+    Args:
+        job (dict): A job from `Batch.hashable`
+    """
+
+    width, height = job["source"]["resolution"]
+    source_pixels = width * height / 1e6
+    frames = get_encoded_frames(job)
+
+    if job["job"]["remux"]:
+        return frames * source_pixels * REMUX_COST
+
+    manifest = job["job"].get("probe_manifest")
+    codec = manifest["result"]["codec"] if manifest else ""
+    if job["job"]["derived_from"]:
+        codec = "dnxhd"  # Derived from an intraframe proxy
+
+    ps = job["settings"]["proxy"]
+    cost = source_pixels * DECODE_COSTS.get(codec, 1)
+    for preset in [ps, *ps["presets"]]:
+        # Proxies are never upscaled
+        scale = min(1, int(preset["vertical_res"]) / height) if height else 1
+        cost += source_pixels * scale**2 * ENCODE_COSTS.get(preset["codec"], 1)
+
+    return frames * cost
+
+
+def get_task_cost(job: dict) -> float:
+    """
+    Estimate the work of the longest single task queued for the job
+
+    Chunks encode in parallel, so a chunked job costs about one chunk.
+    """
+
+    chunks = job["job"]["chunks"]
+    return get_job_cost(job) / max(1, len(chunks))
+
+
+def get_timeline_position(job: dict) -> tuple[float, int]:
+    """Record frame and track of the source's first use, unused last"""
+
+    usages = job["source"].get("usages")
+    if not usages:
+        return float("inf"), 0
+
+    first = min(usages, key=lambda x: (x["record_start"], x["track"]))
+    return first["record_start"], first["track"]
+
+
+def order_jobs(jobs: list[dict], order: QueueOrder) -> list[dict]:
+    """
+    Order jobs for submission
+
+    Longest processing time first (LPT) keeps long encodes from starting
+    last and defining the batch's tail, minimising makespan. Shortest
+    first gets the most clips done soonest. Timeline order follows each
+    clip's first use on the timeline.
+
+    Args:
+        jobs (list[dict]): Jobs from `Batch.hashable`
+        order (QueueOrder): Submission order
+    """
+
+    if order == QueueOrder.timeline:
+        return sorted(jobs, key=get_timeline_position)
+
+    ordered = sorted(jobs, key=get_task_cost, reverse=order == QueueOrder.lpt)
+
+    for job in ordered:
+        logger.debug(
+            f"[magenta] * Estimated cost of '{job['source']['file_name']}': "
+            f"{get_task_cost(job):.0f} per task, {get_job_cost(job):.0f} total"
+        )
+
+    return ordered
+
+
+def get_priority(
+    job: dict,
+    playhead: "Playhead",
+    priority: "Priority",
+    lanes: range = INTERACTIVE_PRIORITIES,
+) -> int:
+    """
+    Get a job's priority lane from its distance to the playhead
+
+    Clips under the playhead get the most urgent lane. Each
+    `level_duration` seconds further away drops a lane. Clips behind the
+    playhead count as `behind_weight` times further away, so the next
+    scenes come first. Clips on the active track are raised a lane.
+    Clips not on the timeline get the least urgent lane.
+
+    Args:
+        job (dict): A job from `Batch.hashable`
+        playhead (Playhead): Playhead position and active track
+        priority (Priority): Priority settings
+        lanes (range, optional): Lanes to choose from, most urgent
+            first. Defaults to every interactive lane.
+
+    Returns:
+        int: Priority from `lanes`
+    """
+
+    levels = [len(lanes) - 1]
+    for usage in job["source"].get("usages") or []:
+        if usage["record_start"] <= playhead.frame < usage["record_end"]:
+            distance = 0.0
+        elif usage["record_start"] > playhead.frame:
+            distance = usage["record_start"] - playhead.frame
+        else:
+            distance = (playhead.frame - usage["record_end"]) * priority.behind_weight
+
+        level = int(distance / playhead.fps // priority.level_duration)
+        if usage["track"] == playhead.track:
+            level -= 1
+        levels.append(level)
+
+    return lanes[max(0, min(levels))]
+
+
+def set_priorities(
+    jobs: list[dict],
+    playhead: "Playhead | None",
+    priority: "Priority",
+    background: bool = False,
+    lanes: range = INTERACTIVE_PRIORITIES,
+):
+    """
+    Set each job's priority lane, for its tasks to be queued with
+
+    Args:
+        jobs (list[dict]): Jobs from `Batch.hashable`
+        playhead (Playhead | None): Playhead position and active track.
+            Every job gets the default priority if None.
+        priority (Priority): Priority settings
+        background (bool, optional): Queue every job in the background
+            lane, behind all interactive work. Defaults to False.
+        lanes (range, optional): Interactive lanes to choose from, most
+            urgent first. Defaults to every interactive lane.
+    """
+
+    # Default priority, kept within the lanes so drafts stay ahead
+    default = min(max(DEFAULT_PRIORITY, lanes[0]), lanes[-1])
+
+    for job in jobs:
+        if background:
+            job["priority"] = BACKGROUND_PRIORITY
+        elif not priority.enabled or playhead is None:
+            job["priority"] = default
+        else:
+            job["priority"] = get_priority(job, playhead, priority, lanes)
+
+        logger.debug(
+            f"[magenta] * Priority of '{job['source']['file_name']}': {job['priority']}"
+        )
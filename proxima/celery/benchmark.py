@@ -0,0 +1,67 @@
+"""
+Benchmark task start latency of the workers consuming from the queue
+
+Pings are queued one at a time, so each measures an idle worker picking
+up a task, including any process restart. Results are grouped by the
+mode of the worker that ran them. Compare by running each mode:
+
+    python -m proxima.celery.benchmark --tasks 50
+
+Latency is measured across hosts, so worker clocks should be in sync.
+"""
+
+import statistics
+import time
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from proxima.celery.tasks import ping
+
+console = Console()
+
+
+def main(
+    tasks: int = typer.Option(50, help="Pings to queue, one at a time"),
+    timeout: int = typer.Option(60, help="Seconds to wait for each ping"),
+):
+    results = []
+
+    with console.status("Pinging workers..."):
+        for _ in range(tasks):
+            sent = time.time()
+            result = ping.apply_async(args=[sent]).get(timeout=timeout)
+            result["round_trip"] = time.time() - sent
+            results.append(result)
+
+    table = Table(title=f"Task start latency, {tasks} tasks")
+    table.add_column("Mode")
+    table.add_column("Tasks", justify="right")
+    table.add_column("Processes", justify="right")
+    table.add_column("Median start", justify="right")
+    table.add_column("Max start", justify="right")
+    table.add_column("Median round trip", justify="right")
+
+    for warm in [False, True]:
+        mode_results = [x for x in results if x["warm"] is warm]
+        if not mode_results:
+            continue
+
+        latencies = [x["latency"] for x in mode_results]
+        round_trips = [x["round_trip"] for x in mode_results]
+
+        table.add_row(
+            "warm" if warm else "restart per task",
+            str(len(mode_results)),
+            str(len({(x["worker"], x["pid"]) for x in mode_results})),
+            f"{statistics.median(latencies) * 1000:.1f} ms",
+            f"{max(latencies) * 1000:.1f} ms",
+            f"{statistics.median(round_trips) * 1000:.1f} ms",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    typer.run(main)
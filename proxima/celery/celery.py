@@ -6,6 +6,7 @@ import sys
 
 from celery import Celery
 
+from proxima.app.scheduling import DEFAULT_PRIORITY, PRIORITY_STEPS
 from proxima.settings.manager import settings
 
 # QUEUE - Celery routing queue using version constraint key
@@ -55,4 +56,32 @@ app.conf.update(
     worker_concurrency=1,
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1,
+    # Redis priority lanes. Lower priorities are consumed first
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    task_default_priority=DEFAULT_PRIORITY,
 )
+
+# Warm mode: reuse child processes, replacing leaky ones by task count
+# and memory. Only prefork has child processes, so supervisor mode's
+# threads take precedence.
+if settings.worker.warm and settings.worker.slots == 1:
+    app.conf.update(
+        worker_pool="prefork",
+        worker_max_tasks_per_child=settings.worker.warm_max_tasks,
+        worker_max_memory_per_child=settings.worker.warm_max_memory * 1024,  # KiB
+    )
+
+# Staging: reserve the next task too, to stage its source meanwhile
+if settings.worker.staging_directory:
+    app.conf.update(worker_prefetch_multiplier=2)
+
+# Supervisor mode: one worker process runs an encode in each slot
+if settings.worker.slots > 1:
+    app.conf.update(
+        worker_pool="threads",
+        worker_concurrency=settings.worker.slots,
+    )
@@ -1,2 +1,3 @@
-from .ffmpeg_process import FfmpegProcess
+from .ffmpeg_process import FfmpegProcess, FfmpegStallError
+from .probing import ProbeManifest, ProbeResult, get_probe_manifest, probe
 from .utils import ffprobe
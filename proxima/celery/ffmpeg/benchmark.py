@@ -0,0 +1,136 @@
+"""
+Benchmark proxy filter graph variants on synthetic sources
+
+Times each variant with FFmpeg's null muxer, so only decode (of a lavfi
+generator) and filtering are measured. Run on a worker to compare graphs
+on its hardware:
+
+    python -m proxima.celery.ffmpeg.benchmark --height 720 --runs 3
+"""
+
+import subprocess
+import time
+from typing import Callable
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from proxima.celery.ffmpeg import builder
+
+console = Console()
+
+# Full range synthetic sources keep the range conversion busy
+SOURCES = {
+    "HD 8-bit 4:2:0": "testsrc2=size=1920x1080:rate=25,format=yuvj420p",
+    "UHD 8-bit 4:2:2": "testsrc2=size=3840x2160:rate=25,format=yuvj422p",
+}
+
+IN_RANGE = "in_range=full"
+
+# Each variant gets the target height and returns its filter chain.
+# Stages are cumulative, from decode only up to the full proxy graph.
+VARIANTS: dict[str, Callable[[int], list[str | None]]] = {
+    "decode only": lambda h: [],
+    "scale": lambda h: [builder.scale_filter(height=h)],
+    "range (native size)": lambda h: [builder.scale_filter(in_range=IN_RANGE)],
+    "scale, range (separate)": lambda h: [
+        builder.scale_filter(height=h),
+        builder.scale_filter(in_range=IN_RANGE),
+    ],
+    "scale + range (merged)": lambda h: [
+        builder.scale_filter(height=h, in_range=IN_RANGE)
+    ],
+    "merged, bilinear": lambda h: [
+        builder.scale_filter(height=h, in_range=IN_RANGE, flags="bilinear")
+    ],
+    "merged, flip": lambda h: [
+        builder.scale_filter(height=h, in_range=IN_RANGE),
+        *builder.flip_filters(True, True),
+    ],
+    "flip, merged": lambda h: [
+        *builder.flip_filters(True, True),
+        builder.scale_filter(height=h, in_range=IN_RANGE),
+    ],
+    "merged, flip, format (proxy)": lambda h: [
+        builder.scale_filter(height=h, in_range=IN_RANGE),
+        *builder.flip_filters(True, True),
+        builder.format_filter("yuv422p"),
+    ],
+}
+
+
+def time_graph(
+    source: str,
+    filter_chain: str,
+    frames: int,
+    runs: int,
+    filter_threads: int | None = None,
+) -> float:
+    """
+    Time a filter chain on a lavfi source, best of all runs in seconds
+    """
+
+    global_thread_args, _, _ = builder.get_thread_args(filter_threads=filter_threads)
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-loglevel",
+        "error",
+        *global_thread_args,
+        "-f",
+        "lavfi",
+        "-i",
+        source,
+        "-vf",
+        filter_chain,
+        "-frames:v",
+        str(frames),
+        "-f",
+        "null",
+        "-",
+    ]
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main(
+    height: int = typer.Option(720, help="Proxy vertical resolution"),
+    frames: int = typer.Option(250, help="Frames to filter per run"),
+    runs: int = typer.Option(3, help="Runs per variant. The fastest is kept"),
+    filter_threads: int = typer.Option(0, help="Filter graph threads. 0 for auto"),
+):
+    for source_name, source in SOURCES.items():
+        table = Table(title=f"{source_name} -> {height}p, {frames} frames")
+        table.add_column("Variant")
+        table.add_column("Filter chain")
+        table.add_column("FPS", justify="right")
+        table.add_column("vs decode only", justify="right")
+
+        baseline = None
+        for variant_name, get_filters in VARIANTS.items():
+            filter_chain = builder.join_filters(get_filters(height))
+            seconds = time_graph(
+                source, filter_chain, frames, runs, filter_threads or None
+            )
+            baseline = baseline or seconds
+
+            table.add_row(
+                variant_name,
+                filter_chain,
+                f"{frames / seconds:.1f}",
+                f"+{(seconds - baseline) / frames * 1000:.2f} ms/frame",
+            )
+
+        console.print(table)
+
+
+if __name__ == "__main__":
+    typer.run(main)
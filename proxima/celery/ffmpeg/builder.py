@@ -0,0 +1,367 @@
+import logging
+from typing import TYPE_CHECKING
+
+from proxima.app import core
+from proxima.settings.manager import Preset, Proxy
+
+if TYPE_CHECKING:
+    from proxima.celery.tasks import TaskJob
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+# Filter graphs are built from lists of filters joined here,
+# so optional filters can never leave stray commas behind.
+
+# Tags trim-aware proxies, black outside the ranges they were used in
+TRIMMED_COMMENT = "proxima:trimmed"
+
+
+def scale_filter(
+    height: int | None = None,
+    in_range: str | None = None,
+    flags: str | None = None,
+) -> str | None:
+    """
+    Get a single scaler for a resize and/or range conversion
+
+    Args:
+        height (int, optional): Height to resize to, keeping aspect.
+            None keeps native size.
+        in_range (str, optional): FFmpeg 'in_range' option to convert to
+            limited range from.
+        flags (str, optional): Scaler algorithm flags, e.g. 'bilinear'.
+            FFmpeg's default if None.
+
+    Returns:
+        str | None: The scale filter, None if there's nothing to do
+    """
+
+    if height is None and in_range in [None, "in_range=limited"]:
+        return None
+
+    options = [f"-2:{height}"] if height else []
+    if in_range:
+        options += [in_range, "out_range=limited"]
+    if flags:
+        options += [f"flags={flags}"]
+
+    return f"scale={':'.join(options)}"
+
+
+def flip_filters(h_flip: bool, v_flip: bool) -> list[str]:
+    """Get the filters to flip video horizontally and/or vertically"""
+    return [x for x, flip in [("hflip", h_flip), ("vflip", v_flip)] if flip]
+
+
+def format_filter(pix_fmt: str | None) -> str | None:
+    """Get the filter to convert to the output pixel format, if any"""
+    return f"format={pix_fmt}" if pix_fmt else None
+
+
+def join_filters(filters: list[str | None]) -> str:
+    """Join a filter chain without disabled filters, null if empty"""
+    return ",".join(x for x in filters if x) or "null"
+
+
+def get_job_flips(job: "TaskJob") -> list[str]:
+    """Flip filters for the job. Derived proxies are already flipped"""
+
+    if job.derived_from:
+        return []
+    return flip_filters(job.source.h_flip, job.source.v_flip)
+
+
+def get_job_scale(job: "TaskJob", preset: Proxy | Preset) -> str | None:
+    """
+    Get one scaler for the job's resize and range conversion, if needed
+
+    Sources at or below the preset's vertical resolution keep their
+    native size. They're never upscaled. Derived proxies are always
+    above it. Limited range input needing no resize skips the scaler.
+    """
+
+    target_height = int(preset.vertical_res)
+    resize = bool(job.derived_from) or job.source.resolution[1] > target_height
+
+    return scale_filter(
+        height=target_height if resize else None,
+        in_range=job.input_level,
+    )
+
+
+def get_output_resolution(job: "TaskJob", preset: Proxy | Preset) -> tuple[int, int]:
+    """
+    Get the resolution the job's video is encoded at for a preset
+
+    Matches `get_job_scale`, which keeps aspect with an even width.
+    """
+
+    width, height = (int(x) for x in job.source.resolution)
+    target_height = int(preset.vertical_res)
+    if not job.derived_from and height <= target_height:
+        return width, height
+
+    return round(target_height * width / (height * 2)) * 2, target_height
+
+
+def fill_filters(
+    job: "TaskJob", preset: Proxy | Preset, duration: float
+) -> list[str | None]:
+    """
+    Get a black frame source for a preset, instead of the source's video
+
+    Generated at the output resolution and pixel format, so it needs no
+    scaler and matches the preset's encoded chunks.
+    """
+
+    width, height = get_output_resolution(job, preset)
+    return [
+        f"color=c=black:s={width}x{height}:r={job.source.fps}:d={duration:.6f}",
+        format_filter(preset.pix_fmt),
+    ]
+
+
+def get_preset_filters(
+    job: "TaskJob", preset: Proxy | Preset, flip: bool = True
+) -> list[str | None]:
+    """
+    Get the filter chain for a single output preset
+
+    Frames are scaled down before flipping and format conversion,
+    so the later filters work on as few pixels as possible.
+    """
+
+    return [
+        get_job_scale(job, preset),
+        *(get_job_flips(job) if flip else []),
+        format_filter(preset.pix_fmt),
+    ]
+
+
+def get_filter_graph(
+    job: "TaskJob", presets: list[Proxy | Preset], fill: float | None = None
+) -> str:
+    """
+    Get the filter graph for all output presets from a single decode
+
+    With multiple presets, video is flipped once and then split,
+    labelling each preset's output `[v{index}]`.
+
+    Args:
+        job (TaskJob): The validated task job
+        presets (list[Proxy | Preset]): Output presets in encode order
+        fill (float, optional): Duration of black frames to generate for
+            each preset instead of decoding the source's video
+
+    Returns:
+        str: A filter chain for one preset, else a complex filter graph
+    """
+
+    if fill is not None:
+        return ";".join(
+            f"{join_filters(fill_filters(job, x, fill))}[v{i}]"
+            for i, x in enumerate(presets)
+        )
+
+    if len(presets) == 1:
+        return join_filters(get_preset_filters(job, presets[0]))
+
+    split = join_filters([*get_job_flips(job), f"split={len(presets)}"])
+    graph = [f"[0:v]{split}" + "".join(f"[s{i}]" for i in range(len(presets)))]
+    graph += [
+        f"[s{i}]{join_filters(get_preset_filters(job, x, flip=False))}[v{i}]"
+        for i, x in enumerate(presets)
+    ]
+
+    return ";".join(graph)
+
+
+def get_thread_args(
+    decoder_threads: int | None = None,
+    encoder_threads: int | None = None,
+    filter_threads: int | None = None,
+    complex_graph: bool = False,
+) -> tuple[list[str], list[str], list[str]]:
+    """
+    Get thread count args, leaving FFmpeg to decide where None
+
+    Encoder threads are slice threads for slice threaded encoders like
+    DNxHR and ProRes. `-filter_threads` only applies to simple `-vf`
+    chains. Complex graphs are budgeted with `-filter_complex_threads`.
+
+    Returns:
+        tuple[list[str], list[str], list[str]]: Global, input and
+            per-output thread args
+    """
+
+    filter_threads_arg = (
+        "-filter_complex_threads" if complex_graph else "-filter_threads"
+    )
+    global_args = [filter_threads_arg, str(filter_threads)] if filter_threads else []
+    input_args = ["-threads", str(decoder_threads)] if decoder_threads else []
+    output_args = ["-threads", str(encoder_threads)] if encoder_threads else []
+    return global_args, input_args, output_args
+
+
+def get_input_args(job: "TaskJob") -> list[str]:
+    """
+    Get the args to read the job's input
+
+    A parallel reader pipes image sequence frames to FFmpeg's stdin.
+    """
+
+    if job.input_is_sequence:
+        return ["-f", "image2pipe", "-framerate", str(job.source.fps), "-i", "-"]
+    return ["-i", job.input_file_path]
+
+
+def get_ffmpeg_command(
+    job: "TaskJob",
+    outputs: list[tuple[str, list[str]]],
+    input_args: list[str] | None = None,
+    muxer_args: list[str] | None = None,
+    fill: float | None = None,
+    decoder_args: list[str] | None = None,
+    decoder_threads: int | None = None,
+    encoder_threads: int | None = None,
+    filter_threads: int | None = None,
+) -> list[str]:
+    """
+    Get the FFmpeg command to encode the job's source media
+
+    The source is decoded once. With multiple output presets,
+    the decoded video is split in the filter graph for each output.
+
+    Args:
+        job (TaskJob): The validated task job
+        outputs (list[tuple[str, list[str]]]): Output file path and
+            extra output args for each preset
+        input_args (list[str], optional): Extra args before the input
+        muxer_args (list[str], optional): Replace the default timecode
+            and flags muxer args
+        fill (float, optional): Duration of black frames to encode
+            instead of the source's video. The source only gives audio.
+        decoder_args (list[str], optional): Decoder args placed
+            immediately before the source input
+        decoder_threads (int, optional): Source decoder threads. FFmpeg
+            decides if None.
+        encoder_threads (int, optional): Encoder threads per output.
+            FFmpeg decides if None.
+        filter_threads (int, optional): Filter graph threads. FFmpeg
+            decides if None.
+
+    Returns:
+        list[str]: FFmpeg command as a list of arguments
+    """
+
+    ps = job.settings.proxy
+    presets = job.presets
+    assert len(outputs) == len(presets)
+
+    if muxer_args is None:
+        muxer_args = [
+            # TIMECODE
+            "-timecode",
+            job.source.start_tc,
+            # FLAGS
+            "-movflags",
+            "+write_colr",
+        ]
+
+    # Multiple presets split the decoded video in a complex filter
+    # graph, fill generates its video in one
+    complex_graph = len(presets) > 1 or fill is not None
+    global_thread_args, input_thread_args, output_thread_args = get_thread_args(
+        decoder_threads, encoder_threads, filter_threads, complex_graph=complex_graph
+    )
+
+    ffmpeg_command = [
+        # INPUT
+        "ffmpeg",
+        "-y",  # Never prompt!
+        *ps.misc_args,
+        *global_thread_args,
+        *(input_args or []),
+        *(decoder_args or []),
+        *input_thread_args,
+        *get_input_args(job),
+    ]
+
+    # VIDEO FILTERS
+    filter_graph = get_filter_graph(job, presets, fill)
+    if complex_graph:
+        ffmpeg_command += ["-filter_complex", filter_graph]
+    else:
+        ffmpeg_command += ["-vf", filter_graph]
+
+    for i, (preset, (output_file_path, output_args)) in enumerate(
+        zip(presets, outputs)
+    ):
+        if complex_graph:
+            ffmpeg_command += ["-map", f"[v{i}]", "-map", "0:a?"]
+
+        ffmpeg_command += [
+            # VIDEO
+            "-c:v",
+            preset.codec,
+            "-profile:v",
+            preset.profile,
+            *output_thread_args,
+            "-vsync",
+            "-1",  # Necessary to match VFR
+            # AUDIO
+            "-c:a",
+            preset.audio_codec,
+            "-ar",
+            preset.audio_samplerate,
+            *muxer_args,
+            *output_args,
+            # OUTPUT
+            output_file_path,
+        ]
+
+    return ffmpeg_command
+
+
+def get_remux_command(job: "TaskJob", output_file_path: str | None = None) -> list[str]:
+    """
+    Get the FFmpeg command to remux a source meeting the proxy spec
+
+    Video is stream copied. Audio is cheaply encoded to the proxy spec.
+
+    Args:
+        job (TaskJob): The validated task job
+        output_file_path (str, optional): Where to write the output.
+            Defaults to the job's output path.
+    """
+
+    ps = job.settings.proxy
+
+    return [
+        "ffmpeg",
+        "-y",  # Never prompt!
+        *ps.misc_args,
+        "-i",
+        job.input_file_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a?",
+        # VIDEO
+        "-c:v",
+        "copy",
+        # AUDIO
+        "-c:a",
+        ps.audio_codec,
+        "-ar",
+        ps.audio_samplerate,
+        # TIMECODE
+        "-timecode",
+        job.source.start_tc,
+        # FLAGS
+        "-movflags",
+        "+write_colr",
+        # OUTPUT
+        output_file_path or job.output_file_path,
+    ]
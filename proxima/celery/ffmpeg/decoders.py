@@ -0,0 +1,92 @@
+import logging
+
+from proxima.app import core
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+# Decoders supporting FFmpeg's `-lowres` option, by codec name, with
+# their max factor. Each factor halves the decoded resolution, skipping
+# most of the decode work.
+LOWRES_DECODERS = {
+    "mjpeg": 3,
+    "jpeg2000": 3,
+    "mpeg1video": 3,
+    "mpeg2video": 3,
+    "mpeg4": 3,
+    "h263": 3,
+    "msmpeg4v1": 3,
+    "msmpeg4v2": 3,
+    "msmpeg4v3": 3,
+    "wmv1": 3,
+    "wmv2": 3,
+    "dvvideo": 3,
+}
+
+# Decoder shortcuts for long-GOP codecs, by codec name. These trade
+# exactness for speed but never drop frames, so frame count and timecode
+# still match the source.
+FAST_DECODE_ARGS = {
+    "h264": ["-skip_loop_filter", "all", "-flags2", "+fast"],
+    "hevc": ["-skip_loop_filter", "all"],
+}
+
+
+def get_lowres_factor(codec: str, height: int, target_height: int) -> int:
+    """
+    Get the largest `-lowres` factor still at or above the target height
+
+    Args:
+        codec (str): Codec name of the input's video stream, per ffprobe
+        height (int): Height of the input's video stream
+        target_height (int): Smallest height decoded frames scale from
+
+    Returns:
+        int: Lowres factor, 0 if the decoder can't reduce resolution
+    """
+
+    max_factor = LOWRES_DECODERS.get(codec, 0)
+
+    factor = 0
+    while factor < max_factor and height >> (factor + 1) >= target_height:
+        factor += 1
+
+    return factor
+
+
+def get_decoder_args(
+    codec: str,
+    height: int,
+    target_height: int,
+    lowres: bool = True,
+    fast: bool = False,
+) -> list[str]:
+    """
+    Get decoder args to place before the input for a cheaper decode
+
+    Args:
+        codec (str): Codec name of the input's video stream, per ffprobe
+        height (int): Height of the input's video stream
+        target_height (int): Largest output height required
+        lowres (bool, optional): Decode at reduced resolution where
+            supported. Defaults to True.
+        fast (bool, optional): Use inexact decoder shortcuts where
+            supported. Defaults to False.
+
+    Returns:
+        list[str]: Decoder args, empty if no shortcuts apply
+    """
+
+    decoder_args = []
+
+    if lowres and (factor := get_lowres_factor(codec, height, target_height)):
+        logger.info(
+            f"[cyan]Decoding '{codec}' at reduced resolution: {height}p -> {height >> factor}p"
+        )
+        decoder_args += ["-lowres", str(factor)]
+
+    if fast and codec in FAST_DECODE_ARGS:
+        logger.info(f"[cyan]Using fast decode for '{codec}'")
+        decoder_args += FAST_DECODE_ARGS[codec]
+
+    return decoder_args
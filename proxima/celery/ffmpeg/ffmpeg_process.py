@@ -1,13 +1,20 @@
 import json
 import logging
 import os
+import queue
 import subprocess
+import sys
+import threading
+import time
+from typing import IO, Callable
 
+from celery.exceptions import SoftTimeLimitExceeded
 from rich.console import Console
 from rich.progress import (
     BarColumn,
     Progress,
     SpinnerColumn,
+    TaskID,
     TextColumn,
     TimeRemainingColumn,
 )
@@ -16,24 +23,52 @@ from rich.prompt import Confirm
 from proxima.app import core
 from proxima.settings.manager import settings
 
-from .utils import ffprobe
+from .multiplexer import get_multiplexer
+from .probing import probe
 
 core.install_rich_tracebacks()
 logger = logging.getLogger("proxima")
 logger.setLevel(settings.worker.loglevel)
 
 
+class FfmpegStallError(Exception):
+    """Raised when the watchdog kills FFmpeg for not making progress"""
+
+    def __init__(self, position: float, stall_timeout: float):
+        self.position = position
+        self.stall_timeout = stall_timeout
+        super().__init__(
+            f"FFmpeg made no progress for {stall_timeout} seconds. "
+            f"Last good position: {position:.3f} seconds"
+        )
+
+
 class FfmpegProcess:
     def __init__(
-        self, task_id: str, channel_id: str, command, ffmpeg_loglevel="verbose"
+        self,
+        task_id: str,
+        channel_id: str,
+        command,
+        ffmpeg_loglevel="verbose",
+        duration: float | None = None,
+        stall_timeout: float | None = None,
+        feed: Callable[[IO[bytes]], None] | None = None,
     ):
         """
         Creates the list of FFmpeg arguments.
         Accepts an optional ffmpeg_loglevel parameter to set the value of FFmpeg's -loglevel argument.
+        Accepts an optional duration in seconds for progress reporting,
+        otherwise the input is probed.
+        Accepts an optional stall timeout in seconds, after which FFmpeg
+        is killed if its progress hasn't advanced.
+        Accepts an optional feed function, run on a separate thread to
+        write FFmpeg's stdin.
         """
 
         self.task_id = task_id
         self.channel_id = channel_id
+        self.stall_timeout = stall_timeout
+        self.feed = feed
 
         index_of_filepath = command.index("-i") + 1
         self._filepath = command[index_of_filepath]
@@ -46,28 +81,38 @@ class FfmpegProcess:
         else:
             self._dir_files = [file for file in os.listdir()]
 
-        self._duration_seconds = float(ffprobe(self._filepath)["format"]["duration"])
+        if duration:
+            self._duration_seconds = float(duration)
+        else:
+            self._duration_seconds = float(probe(self._filepath).duration)
 
         self._ffmpeg_args = command + ["-loglevel", ffmpeg_loglevel]
         self._ffmpeg_args += ["-progress", "pipe:1", "-nostats"]
 
-    def run(self, celery_task_object, logfile=None):
-        # Get progress bar
-        console = Console(record=True)
-        progress_bar = Progress(
-            TextColumn("                   "),  # Spacer to match logging
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            # TextColumn("[progress.completed]{task.completed:>3.0f} of"),
-            # TextColumn("[progress.total]{task.total:>3.0f} secs"),
-            TextColumn("[yellow]ETA:[/]"),
-            TimeRemainingColumn(),
-            # TimeElapsedColumn(),
-            console=console,
-            transient=True,
-        )
+    def _run_feed(self, process: subprocess.Popen):
+        """Feed FFmpeg's stdin, killing FFmpeg if feeding fails"""
+
+        try:
+            self.feed(process.stdin)
+        except Exception as e:
+            logger.error(f"[red]Couldn't feed FFmpeg's input: {e}[/]")
+            process.kill()
+
+    @property
+    def supervised(self) -> bool:
+        """Whether this worker process supervises several encodes"""
+        return settings.worker.slots > 1 and sys.platform != "win32"
+
+    @staticmethod
+    def _read_lines(stream, lines: queue.Queue):
+        """Queue lines from FFmpeg's progress pipe, then None at EOF"""
+
+        for line in iter(stream.readline, b""):
+            lines.put(line.decode())
+        lines.put(None)
+
+    def _start(self, logfile=None) -> subprocess.Popen | None:
+        """Start FFmpeg, logging stderr and feeding stdin if set"""
 
         # Open the logfile for logging if enabled
         if logfile:
@@ -88,11 +133,121 @@ class FfmpegProcess:
         if logfile:
             with open(logfile, "a") as f:
                 process = subprocess.Popen(
-                    self._ffmpeg_args, stdout=subprocess.PIPE, stderr=f
+                    self._ffmpeg_args,
+                    stdin=subprocess.PIPE if self.feed else None,
+                    stdout=subprocess.PIPE,
+                    stderr=f,
                 )
 
+        if process and self.feed:
+            threading.Thread(
+                target=self._run_feed, args=(process,), daemon=True
+            ).start()
+
+        return process
+
+    @staticmethod
+    def _get_seconds_processed(line: str) -> float | None:
+        """Get the seconds FFmpeg has encoded from a progress line"""
+
+        if "out_time_ms" not in line:
+            return None
+
+        out_time_ms = line.strip()[12:]
+        return int(out_time_ms) / 1_000_000 if out_time_ms.isdigit() else None
+
+    def _watch(
+        self,
+        celery_task_object,
+        process: subprocess.Popen,
+        lines: queue.Queue,
+        progress_bar: Progress,
+        encoding_task: TaskID,
+    ):
+        """
+        Report FFmpeg's progress until it exits
+
+        Raises:
+            FfmpegStallError: FFmpeg's progress didn't advance within
+                the stall timeout
+        """
+
         previous_seconds_processed = 0
-        seconds_processed = 0
+        last_progress_time = time.monotonic()
+
+        while True:
+            try:
+                ffmpeg_output = lines.get(timeout=1)
+            except queue.Empty:
+                ffmpeg_output = ""
+
+            if ffmpeg_output is None:  # EOF, FFmpeg has exited
+                break
+
+            seconds_processed = self._get_seconds_processed(ffmpeg_output)
+            if seconds_processed and seconds_processed > previous_seconds_processed:
+                last_progress_time = time.monotonic()
+                seconds_increase = seconds_processed - previous_seconds_processed
+
+                # Update worker stdout progress bar
+                progress_bar.update(
+                    task_id=encoding_task,
+                    advance=seconds_increase,
+                )
+
+                # Update task custom state
+                celery_task_object.update_state(
+                    state="ENCODING",
+                    meta={"percent": seconds_processed / self._duration_seconds * 100},
+                )
+
+                previous_seconds_processed = seconds_processed
+
+            if (
+                self.stall_timeout
+                and time.monotonic() - last_progress_time > self.stall_timeout
+            ):
+                progress_bar.stop()
+                process.kill()
+                process.wait()
+                raise FfmpegStallError(previous_seconds_processed, self.stall_timeout)
+
+    def run(self, celery_task_object, logfile=None) -> int | None:
+        """
+        Run FFmpeg, reporting progress to stdout and as task state
+
+        The progress pipe is read on a separate thread, so a hung FFmpeg
+        can't block the watchdog. Supervising workers read all their
+        progress pipes from a single shared thread instead.
+
+        Raises:
+            FfmpegStallError: FFmpeg's progress didn't advance within
+                the stall timeout
+
+        Returns:
+            int | None: FFmpeg's exit code
+        """
+
+        # Get progress bar
+        console = Console(record=True)
+        progress_bar = Progress(
+            TextColumn("                   "),  # Spacer to match logging
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            # TextColumn("[progress.completed]{task.completed:>3.0f} of"),
+            # TextColumn("[progress.total]{task.total:>3.0f} secs"),
+            TextColumn("[yellow]ETA:[/]"),
+            TimeRemainingColumn(),
+            # TimeElapsedColumn(),
+            console=console,
+            transient=True,
+            # Concurrent bars would garble a supervising worker's output
+            disable=self.supervised,
+        )
+
+        process = self._start(logfile)
 
         encoding_task = progress_bar.add_task(
             description="[yellow]Encode[/]",
@@ -107,42 +262,35 @@ class FfmpegProcess:
         try:
             progress_bar.start()
 
-            while process.poll() is None:
-                while not progress_bar.finished:
-                    if not process.stdout:
-                        break
-
-                    ffmpeg_output = process.stdout.readline().decode()
-
-                    if "out_time_ms" in ffmpeg_output:
-                        seconds_processed = int(ffmpeg_output.strip()[12:]) / 1_000_000
-                        seconds_increase = (
-                            seconds_processed - previous_seconds_processed
-                        )
+            lines = queue.Queue()
+            if self.supervised:
+                get_multiplexer().register(process.stdout, lines)
+            else:
+                threading.Thread(
+                    target=self._read_lines, args=(process.stdout, lines), daemon=True
+                ).start()
 
-                        # Update worker stdout progress bar
-                        progress_bar.update(
-                            task_id=encoding_task,
-                            advance=seconds_increase,
-                        )
+            self._watch(celery_task_object, process, lines, progress_bar, encoding_task)
 
-                        # Update task custom state
-                        celery_task_object.update_state(
-                            state="ENCODING",
-                            meta={
-                                "percent": seconds_processed
-                                / self._duration_seconds
-                                * 100
-                            },
-                        )
-
-                        previous_seconds_processed = seconds_processed
+            progress_bar.stop()
+            process.wait()
+            if process.returncode:
+                logger.error(
+                    f"[red]FFmpeg exited with code {process.returncode}. "
+                    "See the encoder logfile for details.[/]"
+                )
+            else:
+                logger.info("[green]Finished encoding[/]")
+            return process.returncode
 
-                    else:
-                        break
+        except FfmpegStallError:
+            raise
 
+        except SoftTimeLimitExceeded:
             progress_bar.stop()
-            logger.info("[green]Finished encoding[/]")
+            process.kill()
+            logger.error("[red]Task time limit exceeded. FFmpeg process killed.[/]")
+            raise
 
         except KeyboardInterrupt:
             progress_bar.stop()
@@ -0,0 +1,104 @@
+import logging
+import os
+import queue
+import selectors
+import threading
+
+from proxima.app import core
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+
+class ProgressMultiplexer:
+    """
+    Read many FFmpeg processes' progress pipes from a single thread
+
+    Used when one worker process supervises several encodes at once.
+    Pipes are read without blocking as they become ready, and split into
+    lines for each process' queue. None is queued at a pipe's EOF.
+
+    Selectors can't wait on pipes on Windows, so this is POSIX only.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._pending = queue.Queue()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, stream, lines: queue.Queue):
+        """
+        Read lines from a pipe into a queue until EOF
+
+        Args:
+            stream: Readable pipe, e.g. an FFmpeg process' stdout
+            lines (queue.Queue): Queue to put decoded lines in
+        """
+
+        with self._lock:
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        # The selector is only ever touched by its own thread
+        self._pending.put((stream, lines))
+        os.write(self._wakeup_write, b"\0")
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.fd == self._wakeup_read:
+                    os.read(self._wakeup_read, 1024)
+                    self._register_pending()
+                    continue
+
+                self._read(key)
+
+    def _register_pending(self):
+        while not self._pending.empty():
+            stream, lines = self._pending.get()
+            os.set_blocking(stream.fileno(), False)
+            self._selector.register(
+                stream, selectors.EVENT_READ, data=(lines, bytearray())
+            )
+
+    def _read(self, key: selectors.SelectorKey):
+        lines, buffer = key.data
+
+        try:
+            data = os.read(key.fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.debug(f"[magenta]Progress pipe closed: {e}")
+            data = b""
+
+        if not data:  # EOF
+            if buffer:
+                lines.put(buffer.decode())
+            lines.put(None)
+            self._selector.unregister(key.fileobj)
+            return
+
+        buffer += data
+        *complete, remainder = buffer.split(b"\n")
+        for line in complete:
+            lines.put(line.decode() + "\n")
+        buffer[:] = remainder
+
+
+_multiplexer = None
+_multiplexer_lock = threading.Lock()
+
+
+def get_multiplexer() -> ProgressMultiplexer:
+    """Get the worker process' shared progress multiplexer"""
+
+    global _multiplexer
+    with _multiplexer_lock:
+        if _multiplexer is None:
+            _multiplexer = ProgressMultiplexer()
+    return _multiplexer
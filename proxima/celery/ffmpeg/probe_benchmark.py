@@ -0,0 +1,94 @@
+"""
+Benchmark probe backends on real media
+
+Probes every file with each backend and compares their timings and
+results. Run on a queuer or worker, in a media folder on its share:
+
+    python -m proxima.celery.ffmpeg.probe_benchmark *.mov --runs 3
+
+The OS caches file headers after the first read, so the first run of
+each backend is reported separately from the cached runs.
+"""
+
+import statistics
+import time
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from proxima.celery.ffmpeg.probing import BACKENDS, ProbeResult
+
+console = Console()
+
+
+def time_backend(
+    backend: str, files: list[str], runs: int
+) -> tuple[list[float], list[float], dict[str, ProbeResult]]:
+    """
+    Probe every file with a backend, timing first and cached runs
+
+    Files the backend can't probe are left out of the returned results.
+    """
+
+    first, cached, results = [], [], {}
+    probe_file = BACKENDS[backend]
+
+    for file_path in files:
+        for run in range(runs):
+            start = time.perf_counter()
+            try:
+                results[file_path] = probe_file(file_path)
+            except Exception as e:
+                console.print(f"[yellow]{backend} couldn't probe '{file_path}': {e}")
+                break
+
+            elapsed = time.perf_counter() - start
+            (cached if run else first).append(elapsed)
+
+    return first, cached, results
+
+
+def main(
+    files: list[str] = typer.Argument(..., help="Media files to probe"),
+    runs: int = typer.Option(3, min=1, help="Probes per file and backend"),
+):
+    table = Table(title=f"Probe backends, {len(files)} files x {runs} runs")
+    table.add_column("Backend")
+    table.add_column("Probed", justify="right")
+    table.add_column("First run, median", justify="right")
+    table.add_column("Cached, median", justify="right")
+    table.add_column("Total", justify="right")
+
+    all_results = {}
+    for backend in BACKENDS:
+        first, cached, all_results[backend] = time_backend(backend, files, runs)
+
+        def median(timings: list[float]) -> str:
+            if not timings:
+                return "-"
+            return f"{statistics.median(timings) * 1000:.1f} ms"
+
+        table.add_row(
+            backend,
+            f"{len(all_results[backend])}/{len(files)}",
+            median(first),
+            median(cached),
+            f"{sum(first + cached):.2f} s",
+        )
+
+    console.print(table)
+
+    # Backends should agree on everything callers rely on
+    pyav, ffprobe = all_results["pyav"], all_results["ffprobe"]
+    for file_path in pyav.keys() & ffprobe.keys():
+        if pyav[file_path] != ffprobe[file_path]:
+            console.print(
+                f"[yellow]Results differ for '{file_path}':[/]\n"
+                f" - pyav:    {pyav[file_path]}\n"
+                f" - ffprobe: {ffprobe[file_path]}"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import redis
+
+from proxima.app import core
+from proxima.settings import probe_cache_file
+from proxima.settings.manager import settings
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+# Bump when the cached fields change, so stale entries are never read
+CACHE_VERSION = 2
+
+REDIS_PREFIX = f"proxima:probe:{CACHE_VERSION}:"
+
+_redis = None
+_redis_unavailable = False
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_created = False
+
+
+def get_key(file_path: str, stat: os.stat_result) -> str:
+    """
+    Cache key of a file as it is now: normalised path, size and mtime
+
+    Modification times are truncated to seconds, since network shares
+    report them at different precisions.
+    """
+
+    path = os.path.normcase(os.path.normpath(file_path))
+    key = f"{CACHE_VERSION}|{path}|{stat.st_size}|{int(stat.st_mtime)}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    key TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS probes_accessed ON probes (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Get this thread's connection to the local cache tier
+
+    Connections are reused for the life of their thread, and replaced
+    in forked worker processes. The schema is created once per process.
+    """
+
+    global _schema_created
+
+    connection = getattr(_local, "connection", None)
+    if connection is not None and _local.pid == os.getpid():
+        return connection
+
+    connection = sqlite3.connect(probe_cache_file, timeout=10)
+    with _schema_lock:
+        if not _schema_created:
+            connection.execute("PRAGMA journal_mode=WAL")  # Persists in the file
+            connection.executescript(SCHEMA)
+            _schema_created = True
+
+    _local.connection = connection
+    _local.pid = os.getpid()
+    return connection
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+    """
+    Use this thread's connection to the local tier in a transaction
+
+    Each thread has its own connection, so supervised encodes on many
+    threads and many worker processes can all use the cache at once.
+    """
+
+    connection = get_connection()
+    with connection:  # Commits, or rolls back on error
+        yield connection
+
+
+def get_redis() -> redis.Redis | None:
+    """
+    Get the shared cache tier in the broker, None if off or unreachable
+
+    After failing once, the shared tier is skipped for the rest of the
+    process, so an unreachable broker doesn't slow every probe down.
+    """
+
+    global _redis
+
+    if not settings.probe_cache.shared or _redis_unavailable:
+        return None
+
+    if _redis is None:
+        _redis = redis.Redis.from_url(
+            settings.broker.url, socket_timeout=2, socket_connect_timeout=2
+        )
+    return _redis
+
+
+def _shared_failed(e: Exception):
+    global _redis_unavailable
+    _redis_unavailable = True
+    logger.warning(f"[yellow]Shared probe cache unavailable, using local only: {e}")
+
+
+def increment(connection: sqlite3.Connection, name: str):
+    connection.execute(
+        "INSERT INTO counters VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+        (name,),
+    )
+
+
+def get(file_path: str, stat: os.stat_result) -> dict | None:
+    """
+    Get a file's cached probe result, trying the local tier first
+
+    Shared hits are copied to the local tier.
+
+    Returns:
+        dict | None: The cached probe result, None on a miss or if the
+            cache is disabled
+    """
+
+    pc = settings.probe_cache
+    if not pc.enabled:
+        return None
+
+    key = get_key(file_path, stat)
+    now = time.time()
+
+    with connect() as connection:
+        row = connection.execute(
+            "SELECT result FROM probes WHERE key = ? AND accessed > ?",
+            (key, now - pc.ttl * 86400),
+        ).fetchone()
+
+        if row:
+            connection.execute(
+                "UPDATE probes SET accessed = ? WHERE key = ?", (now, key)
+            )
+            increment(connection, "local_hits")
+            logger.debug(f"[magenta] * Probe cache hit (local): '{file_path}'")
+            return json.loads(row[0])
+
+    shared = get_redis()
+    if shared is not None:
+        try:
+            # Reading an entry renews it, so the shared tier expires
+            # least recently used
+            pipeline = shared.pipeline()
+            pipeline.get(REDIS_PREFIX + key)
+            pipeline.expire(REDIS_PREFIX + key, pc.ttl * 86400)
+            value, _ = pipeline.execute()
+        except redis.RedisError as e:
+            _shared_failed(e)
+            value = None
+
+        if value is not None:
+            result = json.loads(value)
+            put(file_path, stat, result, shared=False)
+            with connect() as connection:
+                increment(connection, "shared_hits")
+            logger.debug(f"[magenta] * Probe cache hit (shared): '{file_path}'")
+            return result
+
+    with connect() as connection:
+        increment(connection, "misses")
+    return None
+
+
+def put(file_path: str, stat: os.stat_result, result: dict, shared: bool = True):
+    """
+    Cache a file's probe result locally, and in the shared tier if on
+
+    Entries unused for the TTL are expired, and the local tier
+    is trimmed to its entry limit by least recent use.
+
+    Args:
+        file_path (str): The probed file
+        stat (os.stat_result): The file's stat from before it was probed
+        result (dict): JSON serialisable probe result
+        shared (bool, optional): Also cache in the shared tier.
+            Defaults to True.
+    """
+
+    pc = settings.probe_cache
+    if not pc.enabled:
+        return
+
+    key = get_key(file_path, stat)
+    value = json.dumps(result)
+    now = time.time()
+
+    with connect() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+            (key, file_path, value, now, now),
+        )
+        connection.execute(
+            "DELETE FROM probes WHERE accessed <= ?", (now - pc.ttl * 86400,)
+        )
+        connection.execute(
+            "DELETE FROM probes WHERE key IN "
+            "(SELECT key FROM probes ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (pc.max_entries,),
+        )
+
+    redis_ = get_redis() if shared else None
+    if redis_ is not None:
+        try:
+            redis_.set(REDIS_PREFIX + key, value, ex=pc.ttl * 86400)
+        except redis.RedisError as e:
+            _shared_failed(e)
+
+
+def get_shared_keys() -> list[bytes]:
+    """Keys of every entry in the shared tier"""
+
+    redis_ = get_redis()
+    if redis_ is None:
+        return []
+    return list(redis_.scan_iter(match=f"{REDIS_PREFIX}*", count=1000))
+
+
+def get_stats() -> dict[str, int | float | None]:
+    """
+    Get the size and hit counts of both cache tiers
+
+    Hit counts are this host's since the local tier was last cleared.
+    Shared entries are None if the shared tier is off or unreachable.
+    """
+
+    with connect() as connection:
+        entries, oldest = connection.execute(
+            "SELECT COUNT(*), MIN(created) FROM probes"
+        ).fetchone()
+        counters = dict(connection.execute("SELECT name, value FROM counters"))
+
+    try:
+        shared_entries = len(get_shared_keys()) if get_redis() is not None else None
+    except redis.RedisError as e:
+        _shared_failed(e)
+        shared_entries = None
+
+    return {
+        "local_entries": entries,
+        "local_size": os.path.getsize(probe_cache_file),
+        "oldest": oldest,
+        "shared_entries": shared_entries,
+        "local_hits": counters.get("local_hits", 0),
+        "shared_hits": counters.get("shared_hits", 0),
+        "misses": counters.get("misses", 0),
+    }
+
+
+def clear(local: bool = True, shared: bool = True) -> tuple[int, int]:
+    """
+    Remove every entry from the chosen cache tiers
+
+    Returns:
+        tuple[int, int]: Local and shared entries removed
+    """
+
+    local_removed = shared_removed = 0
+
+    if local:
+        with connect() as connection:
+            local_removed = connection.execute("DELETE FROM probes").rowcount
+            connection.execute("DELETE FROM counters")
+
+    if shared and (redis_ := get_redis()) is not None:
+        try:
+            keys = get_shared_keys()
+            while keys:
+                batch, keys = keys[:1000], keys[1000:]
+                shared_removed += redis_.delete(*batch)
+        except redis.RedisError as e:
+            _shared_failed(e)
+
+    return local_removed, shared_removed
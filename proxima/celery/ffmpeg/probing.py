@@ -0,0 +1,253 @@
+import logging
+import os
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+from typing import Callable
+
+from proxima.app import core
+from proxima.settings.manager import settings
+
+from . import probe_cache
+from .utils import ffprobe
+
+try:
+    import av
+except ImportError:
+    av = None
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """
+    Minimal media info: the container's duration and first video stream
+
+    Codec, profile and pixel format names match those ffprobe reports.
+    Color range is 'pc' (full), 'tv' (limited) or None if unspecified.
+    Comment is the container's comment tag, None if it has none.
+    """
+
+    duration: float | None
+    stream_index: int
+    codec: str
+    profile: str
+    width: int
+    height: int
+    pix_fmt: str
+    color_range: str | None
+    frames: int | None
+    stream_duration: float | None
+    comment: str | None = None
+
+
+def probe_ffprobe(file_path: str) -> ProbeResult:
+    """Probe media with ffprobe in a subprocess, parsing its JSON"""
+
+    info = ffprobe(file_path)
+
+    # Skip attached pictures, like cover art
+    video = next(
+        (
+            x
+            for x in info["streams"]
+            if x["codec_type"] == "video" and x.get("r_frame_rate") != "0/0"
+        ),
+        None,
+    )
+    if video is None:
+        raise ValueError("No video stream")
+
+    duration = info["format"].get("duration")
+    stream_duration = video.get("duration")
+
+    return ProbeResult(
+        duration=float(duration) if duration else None,
+        stream_index=int(video["index"]),
+        codec=video.get("codec_name", ""),
+        profile=video.get("profile", ""),
+        width=int(video.get("width", 0)),
+        height=int(video.get("height", 0)),
+        pix_fmt=video.get("pix_fmt", ""),
+        color_range=video.get("color_range"),
+        frames=int(video["nb_frames"]) if "nb_frames" in video else None,
+        stream_duration=float(stream_duration) if stream_duration else None,
+        comment=info["format"].get("tags", {}).get("comment"),
+    )
+
+
+# libavutil's AVColorRange values
+PYAV_COLOR_RANGES = {1: "tv", 2: "pc"}
+
+
+def probe_pyav(file_path: str) -> ProbeResult:
+    """
+    Probe media in process with PyAV
+
+    Reads only the container header and stream info, decoding no frames.
+    """
+
+    if av is None:
+        raise ImportError("PyAV isn't installed. Install it with 'pip install av'")
+
+    with av.open(file_path) as container:
+        # Attached pictures have no frame rate, like ffprobe's '0/0'
+        video = next((x for x in container.streams.video if x.guessed_rate), None)
+        if video is None:
+            raise ValueError("No video stream")
+
+        codec_context = video.codec_context
+
+        stream_duration = None
+        if video.duration and video.time_base:
+            stream_duration = float(video.duration * video.time_base)
+
+        return ProbeResult(
+            duration=(
+                float(Fraction(container.duration, av.time_base))
+                if container.duration
+                else None
+            ),
+            stream_index=video.index,
+            codec=codec_context.name,
+            profile=codec_context.profile or "",
+            width=codec_context.width,
+            height=codec_context.height,
+            pix_fmt=codec_context.pix_fmt or "",
+            color_range=PYAV_COLOR_RANGES.get(codec_context.color_range),
+            frames=video.frames or None,
+            stream_duration=stream_duration,
+            comment=container.metadata.get("comment"),
+        )
+
+
+# Filesystems and shares store modification times at varied precision
+MTIME_TOLERANCE = 1.0
+
+
+@dataclass(frozen=True)
+class ProbeManifest:
+    """
+    A file's probe result, with its size and mtime when probed
+
+    Shipped with each job, so workers only reprobe changed files.
+    """
+
+    file_path: str
+    size: int
+    mtime: float
+    result: ProbeResult
+
+    @classmethod
+    def from_dict(cls, manifest: dict) -> "ProbeManifest":
+        """Rebuild a manifest from its JSON serialisable dict"""
+        return cls(**{**manifest, "result": ProbeResult(**manifest["result"])})
+
+    def as_dict(self) -> dict:
+        """The manifest as a JSON serialisable dict"""
+        return asdict(self)
+
+    def is_current(self, file_path: str) -> bool:
+        """Whether the manifest describes the file as it is now"""
+
+        if os.path.normpath(file_path) != os.path.normpath(self.file_path):
+            return False
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+
+        return (
+            stat.st_size == self.size
+            and abs(stat.st_mtime - self.mtime) < MTIME_TOLERANCE
+        )
+
+
+BACKENDS: dict[str, Callable[[str], ProbeResult]] = {
+    "pyav": probe_pyav,
+    "ffprobe": probe_ffprobe,
+}
+
+
+def get_backends(backend: str | None = None) -> list[str]:
+    """
+    Get the probe backends to try in order
+
+    'auto' prefers PyAV if installed. ffprobe is always the last resort.
+    """
+
+    backend = backend or settings.app.probe_backend
+    if backend == "auto":
+        backend = "pyav" if av is not None else "ffprobe"
+
+    return list(dict.fromkeys([backend, "ffprobe"]))
+
+
+def probe(file_path: str, backend: str | None = None) -> ProbeResult:
+    """
+    Probe media for its duration and first video stream
+
+    Results are cached by path, size and modification time, so unchanged
+    files are only probed once. Falls back to ffprobe if the preferred
+    backend can't read the file.
+
+    Args:
+        file_path (str): Media to probe
+        backend (str, optional): 'auto', 'pyav' or 'ffprobe'. Defaults
+            to the 'probe_backend' setting.
+
+    Raises:
+        ValueError: Raised if no backend can probe the file
+    """
+
+    # Stat first, so a file changed mid-probe is never cached as current
+    try:
+        stat = os.stat(file_path)
+        cached = probe_cache.get(file_path, stat)
+    except Exception as e:
+        logger.debug(f"[magenta] * Probe cache unavailable for '{file_path}': {e}")
+        stat = cached = None
+
+    if cached:
+        return ProbeResult(**cached)
+
+    errors = []
+    for name in get_backends(backend):
+        try:
+            result = BACKENDS[name](file_path)
+            break
+        except Exception as e:
+            logger.debug(f"[magenta] * Couldn't probe '{file_path}' with {name}: {e}")
+            errors.append(f"{name}: {e}")
+    else:
+        raise ValueError(f"Couldn't probe '{file_path}'. {'; '.join(errors)}")
+
+    if stat:
+        try:
+            probe_cache.put(file_path, stat, asdict(result))
+        except Exception as e:
+            logger.debug(f"[magenta] * Couldn't cache probe of '{file_path}': {e}")
+
+    return result
+
+
+def get_probe_manifest(file_path: str, backend: str | None = None) -> ProbeManifest:
+    """
+    Probe a file, recording its size and modification time beforehand
+
+    Stat comes first, so a file changing mid-probe makes the manifest
+    stale, not wrong.
+
+    Raises:
+        ValueError: Raised if no backend can probe the file
+    """
+
+    stat = os.stat(file_path)
+    return ProbeManifest(
+        file_path=file_path,
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        result=probe(file_path, backend),
+    )
@@ -0,0 +1,56 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO
+
+from proxima.app import core
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+
+
+def read_frame(frame_path: str) -> bytes:
+    with open(frame_path, "rb") as f:
+        return f.read()
+
+
+def feed_frames(
+    frame_paths: list[str], stream: IO[bytes], workers: int = 8, lookahead: int = 32
+):
+    """
+    Read sequence frames ahead of the encoder and pipe them in order
+
+    Frames are read by a pool of threads, so many requests are in flight
+    at once. Reading one frame at a time over a network share is latency
+    bound. FFmpeg decodes frames as they arrive, reading them with
+    `-f image2pipe`.
+
+    Args:
+        frame_paths (list[str]): Frame file paths in encode order
+        stream (IO[bytes]): FFmpeg's stdin
+        workers (int, optional): Threads reading frames. Defaults to 8.
+        lookahead (int, optional): Frames read ahead of the encoder.
+            Defaults to 32.
+    """
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = [executor.submit(read_frame, x) for x in frame_paths[:lookahead]]
+
+            for next_index in range(lookahead, len(frame_paths) + lookahead):
+                stream.write(pending.pop(0).result())
+
+                if next_index < len(frame_paths):
+                    pending.append(executor.submit(read_frame, frame_paths[next_index]))
+
+                if not pending:
+                    break
+
+    except BrokenPipeError:
+        # FFmpeg exited early, its exit code tells why
+        logger.debug("[magenta]FFmpeg closed its input before all frames were fed")
+
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
@@ -51,6 +51,25 @@ def prompt_worker_amount(cpu_cores: int):
     return answer
 
 
+def get_pool_args() -> list[str]:
+    """
+    Override the worker pool for supervisor and warm modes
+
+    One worker process supervises every slot in a thread pool.
+    Warm mode needs prefork, the only pool that reuses and replaces
+    its child processes. Slots take precedence over warm mode.
+
+    Returns:
+        list[str]: Celery worker pool args, empty to keep the default
+    """
+
+    if settings.worker.slots > 1:
+        return [f"-P threads -c {settings.worker.slots}"]
+    if settings.worker.warm:
+        return ["-P prefork -c 1"]
+    return []
+
+
 def new_worker(nickname: str = "") -> int:
     """
     Start a new celery worker in a new process
@@ -120,6 +139,7 @@ def new_worker(nickname: str = "") -> int:
         get_worker_name(nickname),
         get_worker_queue(),
         *settings.worker.celery_args,
+        *get_pool_args(),
     ]
 
     logger.info(f"[cyan]NEW WORKER - {nickname}[/]")
@@ -138,6 +158,17 @@ def new_worker(nickname: str = "") -> int:
 
 
 def launch_workers(workers_to_launch: int) -> list[str]:
+    if settings.worker.warm and settings.worker.slots > 1:
+        logger.warning(
+            "[yellow]Warm mode is ignored with more than 1 slot. "
+            "Supervisor threads are never replaced, set 'slots' to 1 to use it."
+        )
+
+    # Advertise slot count to new workers, so they can budget threads
+    host_slots = workers_to_launch * settings.worker.slots
+    os.environ["PROXIMA_HOST_SLOTS"] = str(host_slots)
+    logger.debug(f"[magenta]Host slots: {host_slots}")
+
     # Start launching
 
     pids = []
@@ -167,6 +198,11 @@ def main(workers: int = 0):
     else:
         print(f"[green]Running on {os_} with {cpu_cores} cores.[/]\n")
         print("For maximum performance, start as many workers as CPU cores.")
+        if settings.worker.slots > 1:
+            print(
+                f"Each worker supervises {settings.worker.slots} encodes, "
+                "so fewer workers are needed."
+            )
         print("Default recommendation is 2 cores spare for Resolve and other tasks.\n")
         launch_workers(prompt_worker_amount(cpu_cores))
 
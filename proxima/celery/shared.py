@@ -10,6 +10,16 @@ from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
 logger = logging.getLogger("proxima")
 
 
+def get_upload_id(task_id: str) -> str:
+    """
+    ID a task's uploads are reported under
+
+    Staged outputs upload after their task returns,
+    so the queuer waits on this result before linking.
+    """
+    return f"{task_id}-uploads"
+
+
 class ProgressTracker:
     def __init__(self):
         """
@@ -30,7 +40,8 @@ class ProgressTracker:
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TextColumn(
-                "[cyan]{task.fields[completed_tasks]}/{task.fields[total_tasks]} | "
+                "[cyan]{task.fields[completed_clips]}/{task.fields[total_clips]} clips | "
+                "{task.fields[completed_chunks]}/{task.fields[total_chunks]} chunks | "
                 "{task.fields[active_workers]} workers"
             ),
         )
@@ -52,28 +63,67 @@ class ProgressTracker:
             active_workers=0,
             description="Task progress",
             total=100,  # percentage
-            completed_tasks=0,
-            total_tasks=0,
+            completed_clips=0,
+            total_clips=0,
+            completed_chunks=0,
+            total_chunks=0,
         )
 
+    @staticmethod
+    def get_chunk_results(result: AsyncResult) -> List[AsyncResult]:
+        """
+        Get the chunk results of a chunked job
+
+        Chunked jobs are queued as chords. The group of chunk tasks
+        is the parent of the concat callback's result.
+
+        Returns:
+            List[AsyncResult]: Chunk results, empty if job isn't chunked
+        """
+        if isinstance(result.parent, GroupResult) and result.parent.results:
+            return result.parent.results
+        return []
+
+    def get_all_results(self, task_results: List[AsyncResult]) -> List[AsyncResult]:
+        """Flatten task results with any chunked jobs' chunk results"""
+        all_results = []
+        for result in task_results:
+            all_results.extend(self.get_chunk_results(result))
+            all_results.append(result)
+        return all_results
+
     def update_last_status(self, task_results: List[AsyncResult]):
         for result in task_results:
             if not result or not result.args:
                 continue
 
+            # Bundles report each clip they start encoding
+            status = result.status
+            clip = self.get_bundle_clip(result)
+            if clip is not None:
+                status = f"{status}_{clip}"
+
             # Skip if we've already seen this data
             if (
                 result.id in self.already_seen
-                and self.already_seen[result.id] == result.status
+                and self.already_seen[result.id] == status
             ):
                 continue
 
+            name = self.get_task_name(result, clip)
+
             switch = {
-                "STARTED": f"[bold cyan] :blue_circle: {result.worker}[/] -> [cyan]started on '{result.args[0]['source']['file_name']}'",
-                "SUCCESS": f"[bold green] :green_circle: {result.worker}[/] -> [green]finished '{result.args[0]['source']['file_name']}'",
-                "FAILURE": f"[bold red] :red_circle: {result.worker}[/] -> [red]failed '{result.args[0]['source']['file_name']}'",
+                "STARTED": f"[bold cyan] :blue_circle: {result.worker}[/] -> [cyan]started on {name}",
+                "SUCCESS": f"[bold green] :green_circle: {result.worker}[/] -> [green]finished {name}",
+                "FAILURE": f"[bold red] :red_circle: {result.worker}[/] -> [red]failed {name}",
+                "RETRY": f"[bold yellow] :yellow_circle: {result.worker}[/] -> [yellow]requeued {name}",
             }
 
+            if clip is not None:
+                switch.update(
+                    ENCODING=f"[bold cyan] :blue_circle: {result.worker}[/] -> [cyan]encoding {name}"
+                )
+
             if last_status := switch.get(result.status):
                 self.status_view.update(
                     task_id=self.status_view_id,
@@ -81,25 +131,128 @@ class ProgressTracker:
                 )
 
             # Add to already seen, so we don't handle this event again
-            self.already_seen.update({result.id: result.status})
+            self.already_seen.update({result.id: status})
+
+    @staticmethod
+    def get_bundle_clip(result: AsyncResult) -> int | None:
+        """Index of the clip a bundle task is encoding, if any"""
+        if (
+            isinstance(result.args[0], list)
+            and result.status == "ENCODING"
+            and isinstance(result.info, dict)
+        ):
+            return result.info.get("clip")
+        return None
+
+    @staticmethod
+    def get_upload_result(result: AsyncResult) -> AsyncResult | None:
+        """
+        Get the result of a finished task's uploads
+
+        Successful tasks and bundles with failed clips report uploads.
+
+        Returns:
+            AsyncResult | None: Upload result, None without uploads
+        """
+        if result.successful() or (
+            result.failed() and getattr(result.info, "failed", None) is not None
+        ):
+            return AsyncResult(get_upload_id(result.id), app=result.app)
+        return None
+
+    @staticmethod
+    def get_clip_counts(task_results: List[AsyncResult]) -> tuple[int, int, int]:
+        """
+        Count finished clips, rather than tasks
+
+        Bundles count each of their clips. A failed bundle's error lists
+        which of its clips failed, the rest succeeded. Clips only
+        succeed once their outputs are uploaded.
+
+        Returns:
+            tuple[int, int, int]: Succeeded, failed and total clips
+        """
+
+        succeeded = failed = total = 0
+        for result in task_results:
+            job = result.args[0] if result.args else None
+            clips = len(job) if isinstance(job, list) else 1
+            total += clips
+
+            # A failed upload fails its clips, even if they encoded
+            upload_result = ProgressTracker.get_upload_result(result)
+            if upload_result and upload_result.failed():
+                result = upload_result
+            elif upload_result and not upload_result.ready():
+                continue
+
+            if result.successful():
+                succeeded += clips
+
+            elif result.failed():
+                # Bundle errors carry the indexes of their failed clips
+                failed_clips = getattr(result.info, "failed", None)
+                if isinstance(job, list) and isinstance(failed_clips, list):
+                    failed += len(failed_clips)
+                    succeeded += clips - len(failed_clips)
+                else:
+                    failed += clips
+
+        return succeeded, failed, total
+
+    @staticmethod
+    def get_task_name(result: AsyncResult, clip: int | None = None) -> str:
+        """Readable name of a task's media for status messages"""
+
+        job = result.args[0]
+
+        # Bundled jobs
+        if isinstance(job, list):
+            name = f"bundle of {len(job)} clips"
+            if clip is not None:
+                file_name = job[clip]["source"]["file_name"]
+                name = f"clip {clip + 1}/{len(job)} '{file_name}' of {name}"
+            return name
+
+        name = f"'{job['source']['file_name']}'"
+        if chunk := job.get("chunk"):
+            name = f"chunk {chunk['index'] + 1}/{chunk['count']} of {name}"
+        return name
+
+    @staticmethod
+    def get_percent(result: AsyncResult) -> float:
+        """Encoding progress of a single task as a percentage"""
+        if result.ready():
+            return 100
+        if result.status == "ENCODING":
+            return result.info.get("percent", 0)
+        return 0
 
     def update_progress(self, task_results: List[AsyncResult]):
         # Get encoding progress from task custom status
+        all_results = self.get_all_results(task_results)
+        if not [x for x in all_results if x.status == "ENCODING"]:
+            return
+
         try:
-            progress_data = [
-                x.info.get("percent") for x in task_results if x.status == "ENCODING"
-            ]
+            progress_data = []
+            for result in task_results:
+                # Chunked jobs progress by their chunks until joined
+                chunk_results = self.get_chunk_results(result)
+                if chunk_results and not result.ready():
+                    progress_data.append(
+                        sum(self.get_percent(x) for x in chunk_results)
+                        / len(chunk_results)
+                    )
+                    continue
+
+                progress_data.append(self.get_percent(result))
+
         except AttributeError as e:
             # Sometimes (rarely) Celery passes a string instead of a dict.
             logger.debug(f"[red]Progress error: {e}")
             return
 
-        if not progress_data:
-            return
-
-        # Make sure we keep account for finished tasks
-        completed_data = [100 for x in task_results if x.ready()]
-        progress_data.extend(completed_data)
         progress_avg = sum(progress_data) / len(task_results)
 
         # Update average progress
@@ -123,20 +276,40 @@ class ProgressTracker:
                     self.update_progress(task_results)
 
                     # HANDLE LAST STATUS
-                    self.update_last_status(task_results)
+                    all_results = self.get_all_results(task_results)
+                    self.update_last_status(all_results)
 
                     # HANDLE TASK INFO
+                    chunk_results = [
+                        chunk
+                        for result in task_results
+                        for chunk in self.get_chunk_results(result)
+                    ]
+                    clip_counts = self.get_clip_counts(task_results)
                     self.progress.update(
                         task_id=self.progress_id,
                         active_workers=len(
-                            [x for x in task_results if x.status == "ENCODING"]  # type: ignore
+                            [x for x in all_results if x.status == "ENCODING"]  # type: ignore
                         ),
-                        completed_tasks=group_results.completed_count(),
-                        total_tasks=len(task_results),
+                        completed_clips=sum(clip_counts[:2]),
+                        total_clips=clip_counts[2],
+                        completed_chunks=len([x for x in chunk_results if x.ready()]),
+                        total_chunks=len(chunk_results),
                     )
 
                     time.sleep(0.001)
 
+                # Staged outputs upload after their tasks return
+                upload_results = [
+                    x for x in map(self.get_upload_result, group_results.results) if x
+                ]
+                while pending := [x for x in upload_results if not x.ready()]:
+                    self.status_view.update(
+                        task_id=self.status_view_id,
+                        last_status=f"[yellow]Waiting for {len(pending)} uploads...",
+                    )
+                    time.sleep(0.5)
+
             except:
                 raise
 
@@ -0,0 +1,406 @@
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from celery import signals
+from celery.worker import state as worker_state
+
+from proxima.app import core
+from proxima.celery.shared import get_upload_id
+from proxima.settings.manager import settings
+from proxima.types.job import parse_image_sequence
+
+core.install_rich_tracebacks()
+logger = logging.getLogger("proxima")
+logger.setLevel(settings.worker.loglevel)
+
+# Large sequential reads keep network shares streaming, not seeking
+BLOCK_SIZE = 16 * 1024 * 1024
+
+_pending = queue.Queue()
+_queued = set()
+_lock = threading.Lock()
+_thread = None
+_uploader = None
+_uploads: dict[str, Future] = {}  # In flight, by output file path
+
+
+def get_staging_directory() -> str | None:
+    """Local scratch directory for staged sources, if staging is on"""
+    return settings.worker.staging_directory or None
+
+
+def get_staged_file_path(source_file_path: str) -> str | None:
+    """
+    Path a source would be staged to, None if it can't be staged
+
+    Staged files are named by the source's path, size and modification
+    time, so a changed source is never mistaken for its staged copy.
+    """
+
+    staging_directory = get_staging_directory()
+    if not staging_directory:
+        return None
+
+    try:
+        stat = os.stat(source_file_path)
+    except OSError:
+        return None
+
+    key = f"{source_file_path}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(
+        staging_directory, f"{digest}_{os.path.basename(source_file_path)}"
+    )
+
+
+def get_input_file_path(source_file_path: str) -> str:
+    """
+    Get the staged copy of a source if it's ready, else the source
+
+    Using a staged copy marks it as recently used, so it's evicted last.
+    """
+
+    staged_file_path = get_staged_file_path(source_file_path)
+    if not staged_file_path or not os.path.exists(staged_file_path):
+        return source_file_path
+
+    os.utime(staged_file_path)
+    logger.info(f"[green]Reading staged copy of '{source_file_path}'[/]")
+    return staged_file_path
+
+
+def evict(required_bytes: int) -> bool:
+    """
+    Evict least recently used staged files until the quota has room
+
+    Evicting a file that's still being read is safe on POSIX,
+    the reader keeps its open handle. Elsewhere the file is skipped.
+
+    Returns:
+        bool: Whether the required space fits the quota
+    """
+
+    staging_directory = get_staging_directory()
+    quota = int(settings.worker.staging_quota * 1024**3)
+    if not staging_directory or required_bytes > quota:
+        return False
+
+    entries = sorted(
+        (x for x in os.scandir(staging_directory) if x.is_file()),
+        key=lambda x: x.stat().st_mtime,
+    )
+    used = sum(x.stat().st_size for x in entries)
+
+    for entry in entries:
+        if used + required_bytes <= quota:
+            break
+        if entry.name.endswith(".partial"):  # Still being staged
+            continue
+
+        try:
+            size = entry.stat().st_size
+            os.remove(entry.path)
+        except OSError:
+            continue
+
+        used -= size
+        logger.debug(f"[magenta] * Evicted staged file '{entry.name}'")
+
+    return used + required_bytes <= quota
+
+
+def stage(source_file_path: str):
+    """
+    Copy a source to the staging directory with large sequential reads
+
+    Copies to a temporary file first, so partial copies are never read.
+    """
+
+    staged_file_path = get_staged_file_path(source_file_path)
+    if not staged_file_path or os.path.exists(staged_file_path):
+        return
+
+    size = os.path.getsize(source_file_path)
+    if not evict(size):
+        logger.debug(
+            f"[magenta] * '{source_file_path}' doesn't fit the staging quota, not staging"
+        )
+        return
+
+    logger.info(f"[cyan]Staging '{source_file_path}' for the next task...")
+    partial_file_path = f"{staged_file_path}.{os.getpid()}.partial"
+
+    with open(source_file_path, "rb") as src, open(partial_file_path, "wb") as dst:
+        # Ask the OS to read ahead aggressively
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+
+        while block := src.read(BLOCK_SIZE):
+            dst.write(block)
+
+    os.replace(partial_file_path, staged_file_path)
+    logger.info(f"[green]Staged '{source_file_path}'[/]")
+
+
+def _run():
+    while True:
+        source_file_path = _pending.get()
+        try:
+            stage(source_file_path)
+        except Exception as e:
+            logger.warning(f"[yellow]Couldn't stage '{source_file_path}': {e}")
+        finally:
+            with _lock:
+                _queued.discard(source_file_path)
+
+
+def prefetch(source_file_path: str):
+    """Stage a source in the background, unless staged or queued"""
+
+    global _thread
+
+    with _lock:
+        if source_file_path in _queued:
+            return
+        _queued.add(source_file_path)
+
+        if not _thread:
+            _thread = threading.Thread(target=_run, daemon=True)
+            _thread.start()
+
+    _pending.put(source_file_path)
+
+
+def get_request_sources(request) -> list[str]:
+    """
+    Source file paths of a reserved task request's jobs
+
+    Image sequences are skipped, their frames are already read ahead.
+    """
+
+    if not request.args:
+        return []
+
+    jobs = request.args[0]
+    if isinstance(jobs, dict):  # Not a bundle
+        jobs = [jobs]
+    if not isinstance(jobs, list):  # Not an encode task
+        return []
+
+    return [
+        x["source"]["file_path"]
+        for x in jobs
+        if isinstance(x, dict)
+        and "source" in x
+        and not x["job"].get("derived_from")
+        and not parse_image_sequence(x["source"]["file_path"])
+    ]
+
+
+@signals.task_prerun.connect
+def prefetch_reserved(task_id=None, **_):
+    """
+    Stage reserved tasks' sources while the current task runs
+
+    Only the worker's main process knows its reserved tasks,
+    so this applies to the solo and threads pools.
+    """
+
+    if not get_staging_directory():
+        return
+
+    os.makedirs(get_staging_directory(), exist_ok=True)
+
+    for request in list(worker_state.reserved_requests):
+        if request.id == task_id or request in worker_state.active_requests:
+            continue
+        for source_file_path in get_request_sources(request):
+            prefetch(source_file_path)
+
+
+def get_output_staging_directory() -> str | None:
+    """Local scratch directory to encode outputs to, if staging them"""
+
+    staging_directory = get_staging_directory()
+    if not staging_directory or not settings.worker.output_staging:
+        return None
+    return os.path.join(staging_directory, "outputs")
+
+
+def get_output_staging_path(output_file_path: str) -> str:
+    """
+    Local path to encode an output to before it's uploaded
+
+    Returns:
+        str: Local scratch path if staging outputs, else the output path
+    """
+
+    output_staging_directory = get_output_staging_directory()
+    if not output_staging_directory:
+        return output_file_path
+
+    os.makedirs(output_staging_directory, exist_ok=True)
+    digest = hashlib.sha1(output_file_path.encode()).hexdigest()[:16]
+    return os.path.join(
+        output_staging_directory, f"{digest}_{os.path.basename(output_file_path)}"
+    )
+
+
+def upload(staged_file_path: str, output_file_path: str):
+    """
+    Copy a staged output into place with large buffered writes
+
+    The copy is written beside the output, verified and renamed into
+    place, so a partial upload is never linkable.
+
+    Raises:
+        IOError: Raised if the uploaded size doesn't match
+    """
+
+    output_directory, output_file_name = os.path.split(output_file_path)
+    partial_file_path = os.path.join(output_directory, f".{output_file_name}.uploading")
+    os.makedirs(output_directory, exist_ok=True)
+
+    logger.info(f"[cyan]Uploading '{output_file_name}'...")
+
+    with open(staged_file_path, "rb") as src, open(
+        partial_file_path, "wb", buffering=BLOCK_SIZE
+    ) as dst:
+        shutil.copyfileobj(src, dst, BLOCK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    staged_size = os.path.getsize(staged_file_path)
+    uploaded_size = os.path.getsize(partial_file_path)
+    if uploaded_size != staged_size:
+        os.remove(partial_file_path)
+        raise IOError(
+            f"Upload of '{output_file_name}' is incomplete: {uploaded_size} of {staged_size} bytes"
+        )
+
+    os.replace(partial_file_path, output_file_path)
+    os.remove(staged_file_path)
+    logger.info(f"[green]Uploaded '{output_file_name}'[/]")
+
+
+def publish(file_path: str, output_file_path: str) -> Future:
+    """
+    Move a finished output into place
+
+    Staged outputs are uploaded by a background thread, so the worker
+    can move on to its next encode. Anything else is moved immediately.
+
+    Returns:
+        Future: Resolves once the output is verified in place
+    """
+
+    global _uploader
+
+    if file_path == output_file_path:
+        future = Future()
+        future.set_result(None)
+        return future
+
+    output_staging_directory = get_output_staging_directory()
+    if not output_staging_directory or not file_path.startswith(
+        output_staging_directory
+    ):
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+        os.replace(file_path, output_file_path)
+        return publish(output_file_path, output_file_path)
+
+    with _lock:
+        if not _uploader:
+            _uploader = ThreadPoolExecutor(max_workers=1)
+
+        future = _uploader.submit(upload, file_path, output_file_path)
+        _uploads[output_file_path] = future
+
+    def forget(_):
+        with _lock:
+            if _uploads.get(output_file_path) is future:
+                del _uploads[output_file_path]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def get_upload(output_file_path: str) -> Future | None:
+    """Get the upload of an output in flight on this worker, if any"""
+    with _lock:
+        return _uploads.get(output_file_path)
+
+
+def on_uploaded(uploads: list[Future], callback: Callable[[list[int]], None]):
+    """
+    Call back once every upload is done, with indexes of any that failed
+
+    Runs on the uploader thread, or right away if every upload is done.
+    """
+
+    if not uploads:
+        callback([])
+        return
+
+    remaining = len(uploads)
+    remaining_lock = threading.Lock()
+
+    def done(_):
+        nonlocal remaining
+        with remaining_lock:
+            remaining -= 1
+            if remaining:
+                return
+
+        try:
+            callback([i for i, x in enumerate(uploads) if x.exception()])
+        except Exception as e:
+            logger.exception(f"[red]Couldn't report uploads: {e}")
+
+    for upload_ in uploads:
+        upload_.add_done_callback(done)
+
+
+def report_uploads(
+    task,
+    uploads: list[Future],
+    on_success: Callable[[], None] | None = None,
+    get_error: Callable[[list[int]], Exception] | None = None,
+):
+    """
+    Report a task's uploads under its upload ID once they're done
+
+    The task returns without waiting, so its slot is free for the next
+    encode while the worker-level uploader copies its outputs. The
+    uploader outlives the task and finishes before the worker exits.
+
+    Args:
+        task: Bound Celery task the uploads belong to
+        uploads: Futures returned by `publish`
+        on_success: Called once every upload is in place, e.g. cleanup
+        get_error: Builds the reported error from the indexes of failed
+            uploads. Defaults to the first failed upload's exception.
+    """
+
+    upload_id = get_upload_id(task.request.id)
+    backend = task.backend
+
+    def report(failed: list[int]):
+        if not failed:
+            if on_success:
+                on_success()
+            backend.mark_as_done(upload_id, None)
+            return
+
+        error = get_error(failed) if get_error else uploads[failed[0]].exception()
+        logger.error(f"[red] :warning: Couldn't upload proxy.[/]\n{error}")
+        backend.mark_as_failure(upload_id, error)
+
+    on_uploaded(uploads, report)
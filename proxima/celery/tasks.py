@@ -1,27 +1,48 @@
+import csv
 import logging
 import os
-from dataclasses import dataclass, fields
+import shutil
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field, fields
+from functools import cached_property, partial
+from glob import glob
+from typing import Callable
 
-from celery.exceptions import Reject
+from celery.exceptions import Reject, Retry, SoftTimeLimitExceeded
 from rich import print
 from rich.console import Console
 
 from proxima.app import core
-from proxima.celery import celery_app
+from proxima.celery import celery_app, staging
 from proxima.celery.celery import celery_queue
-from proxima.celery.ffmpeg import FfmpegProcess
+from proxima.celery.ffmpeg import (
+    FfmpegProcess,
+    FfmpegStallError,
+    ProbeManifest,
+    ProbeResult,
+    decoders,
+    probe,
+)
+from proxima.celery.ffmpeg.builder import (
+    TRIMMED_COMMENT,
+    get_ffmpeg_command,
+    get_remux_command,
+)
+from proxima.celery.ffmpeg.sequence_reader import feed_frames
 from proxima.settings.manager import (
     App,
     BaseModel,
     Broker,
     Filters,
     Paths,
+    Preset,
     Proxy,
     Settings,
     Worker,
     settings,
 )
-from proxima.types.job import ProjectMetadata, SourceMetadata
+from proxima.types.job import ChunkMetadata, ProjectMetadata, SourceMetadata
 
 # Worker and Celery settings pulled from worker's proxima configuration.
 # All other settings are passed from queuer
@@ -57,19 +78,26 @@ class TaskJob:
     output_file_name: str
     output_directory: str
     input_level: str
+    output_file_paths: dict[str, str] = field(default_factory=dict)
+    remux: bool = False
+    derived_from: str | None = None
+    chunk: ChunkMetadata | None = None
+    staged_file_path: str | None = None
+    probe_manifest: ProbeManifest | None = None
 
     def __post_init__(self):
         # TODO: Custom exceptions for task job validation
 
-        if not os.path.exists(self.source.file_path):  # SOURCE ACCESSIBLE
+        if not os.path.exists(self.probe_file_path):  # SOURCE ACCESSIBLE
             raise FileNotFoundError(
-                f"Provided source file '{self.source.file_path}' does not exist"
+                f"Provided source file '{self.input_file_path}' does not exist"
             )
 
-        if os.path.exists(self.output_file_path):  # NO OVERWRITE
-            raise FileExistsError(
-                f"File already exists at provided output path {self.output_file_path}"
-            )
+        for output_file_path in self.get_output_file_paths():  # NO OVERWRITE
+            if os.path.exists(output_file_path):
+                raise FileExistsError(
+                    f"File already exists at provided output path {output_file_path}"
+                )
         if self.input_level not in [
             "in_range=full",
             "in_range=limited",
@@ -78,148 +106,1057 @@ class TaskJob:
                 f"Calculated video levels are invalid: '{self.input_level}'"
             )
 
+    @property
+    def input_file_path(self) -> str:
+        """Proxy to derive from, else the source or its staged copy"""
+        return self.derived_from or self.staged_file_path or self.source.file_path
 
-def ffmpeg_video_flip(job: TaskJob):
-    flip_string = ""
-    if job.source.h_flip:
-        flip_string += "hflip, "
-    if job.source.v_flip:
-        flip_string += "vflip, "
-    return flip_string
+    @property
+    def input_is_sequence(self) -> bool:
+        """Whether the input is an image sequence, not a single file"""
+        return not self.derived_from and self.source.sequence is not None
 
+    @property
+    def probe_file_path(self) -> str:
+        """A single input file to probe, a sequence's first frame"""
+        if self.input_is_sequence:
+            return self.source.probe_file_path
+        return self.input_file_path
 
-@celery_app.task(
-    bind=True,
-    acks_late=True,
-    track_started=True,
-    prefetch_limit=1,
-    soft_time_limit=60,
-    reject_on_worker_lost=True,
-    queue=celery_queue,
-)
-def encode_proxy(self, job_dict: dict) -> str:
-    """
-    Celery task to encode proxy media using parameters in job argument
-    and user-defined settings
-    """
+    @cached_property
+    def probe_result(self) -> ProbeResult:
+        """
+        Probe result of the input
+
+        Taken from the queuer's probe manifest if it describes the input
+        and the file is unchanged. Otherwise the input is probed.
+
+        Raises:
+            ValueError: Raised if the input can't be probed
+        """
+
+        manifest_file_path = self.derived_from or self.source.probe_file_path
+        if self.probe_manifest and self.probe_manifest.is_current(manifest_file_path):
+            return self.probe_manifest.result
+
+        logger.debug("[magenta] * No current probe manifest, probing input")
+        return probe(self.probe_file_path)
+
+    @property
+    def duration(self) -> float | None:
+        """Duration of the input in seconds, if it can be probed"""
+
+        try:
+            return self.probe_result.duration
+        except Exception as e:
+            logger.warning(f"[yellow]Couldn't probe input for its duration: {e}")
+            return None
+
+    def get_frame_paths(self, start: int = 0, end: int | None = None) -> list[str]:
+        """Image sequence frame paths to encode, by frame index"""
+        assert self.source.sequence
+        return self.source.sequence.frame_paths[start:end]
+
+    @property
+    def presets(self) -> list[Proxy | Preset]:
+        """Output presets in encode order, the linked proxy's first"""
+        return [self.settings.proxy, *self.settings.proxy.presets]
+
+    def get_output_file_paths(self) -> list[str]:
+        """Output file paths in preset order"""
+        return [
+            self.output_file_paths.get(x.nickname, self.output_file_path)
+            if i
+            else self.output_file_path
+            for i, x in enumerate(self.presets)
+        ]
+
+    @property
+    def chunk_directory(self) -> str:
+        """Shared directory chunks are encoded to before joining"""
+        return os.path.join(self.output_directory, f".{self.output_file_name}_chunks")
+
+    def get_chunk_file_path(self, index: int, preset_index: int = 0) -> str:
+        """Path of the chunk at an index for an output preset"""
+        ext = os.path.splitext(self.get_output_file_paths()[preset_index])[1]
+        return os.path.join(
+            self.chunk_directory, f"chunk_{index:04d}_{preset_index}{ext}"
+        )
+
+    @property
+    def checkpoint_directory(self) -> str:
+        """Shared directory of checkpoint segments"""
+        return os.path.join(
+            self.output_directory, f".{self.output_file_name}_checkpoints"
+        )
+
+
+def get_task_job(job_dict: dict) -> TaskJob:
+    """Validate a job dict received from the queuer as a TaskJob"""
 
     logger.debug(f"[magenta]Received job dict {job_dict}")
 
-    project_metadata = class_from_args(ProjectMetadata, job_dict["project"])
-    source_metadata = class_from_args(SourceMetadata, job_dict["source"])
+    chunk_metadata = None
+    if job_dict.get("chunk"):
+        chunk_metadata = class_from_args(ChunkMetadata, job_dict["chunk"])
 
-    job = TaskJob(
+    source_file_path = job_dict["source"]["file_path"]
+    staged_file_path = None
+    if not job_dict["job"].get("derived_from"):
+        staged_file_path = staging.get_input_file_path(source_file_path)
+
+    probe_manifest = None
+    if job_dict["job"].get("probe_manifest"):
+        probe_manifest = ProbeManifest.from_dict(job_dict["job"]["probe_manifest"])
+
+    return TaskJob(
         settings=TaskSettings(**job_dict["settings"]),
-        project=project_metadata,
-        source=source_metadata,
+        project=class_from_args(ProjectMetadata, job_dict["project"]),
+        source=class_from_args(SourceMetadata, job_dict["source"]),
         output_file_path=job_dict["job"]["output_file_path"],
         output_file_name=job_dict["job"]["output_file_name"],
         output_directory=job_dict["job"]["output_directory"],
         input_level=job_dict["job"]["input_level"],
+        output_file_paths=job_dict["job"].get("output_file_paths", {}),
+        remux=job_dict["job"].get("remux", False),
+        derived_from=job_dict["job"].get("derived_from"),
+        chunk=chunk_metadata,
+        staged_file_path=staged_file_path,
+        probe_manifest=probe_manifest,
     )
 
-    # Create proxy output directory
-    os.makedirs(job.output_directory, exist_ok=True)
 
-    # Print new job header ############################################
+def get_seek_args(job: TaskJob, start_frame: int) -> list[str]:
+    """
+    Get input args to seek to a start frame
 
-    print("\n")
-    console.rule("[green]Received proxy encode job :clapper:[/]", align="left")
-    print("\n")
+    Image sequences aren't seeked, frames from the start frame are fed.
+    """
 
-    logger.info(
-        f"[magenta bold]Job: [/]{self.request.id}\n"
-        f"Input File: '{job.source.file_path}'"
+    if job.input_is_sequence:
+        return []
+    return ["-ss", f"{start_frame / job.source.fps:.6f}"]
+
+
+def get_input_stream(job: TaskJob) -> ProbeResult | None:
+    """Probe the job's input for its first video stream, if possible"""
+
+    try:
+        return job.probe_result
+    except Exception as e:
+        logger.warning(f"[yellow]Couldn't probe input for decoder options: {e}")
+        return None
+
+
+def get_job_decoder_args(job: TaskJob) -> list[str]:
+    """
+    Get decoder args suited to the job's input, per worker capabilities
+
+    Decoding only needs to be good enough for the largest output preset.
+    """
+
+    lowres = settings.worker.reduced_resolution_decode
+    fast = settings.worker.fast_decode
+    if not (lowres or fast):
+        return []
+
+    stream = get_input_stream(job)
+    if not stream:
+        return []
+
+    return decoders.get_decoder_args(
+        codec=stream.codec,
+        height=stream.height,
+        target_height=max(int(x.vertical_res) for x in job.presets),
+        lowres=lowres,
+        fast=fast,
     )
 
-    ###################################################################
 
-    # Log job details
-    logger.info(f"Output File: '{job.output_file_path}'\n")
-    logger.info(
-        f"Source Resolution: {job.source.resolution[0]} x {job.source.resolution[1]}"
+def get_host_slots() -> int:
+    """
+    Get the number of encodes this host runs at once
+
+    Set in settings, otherwise advertised by `launch_workers` to every
+    worker it starts. Workers started some other way are assumed to have
+    the host to themselves.
+    """
+
+    if settings.worker.host_slots:
+        return settings.worker.host_slots
+
+    try:
+        return max(1, int(os.getenv("PROXIMA_HOST_SLOTS", 1)))
+    except ValueError:
+        logger.warning("[yellow]Invalid 'PROXIMA_HOST_SLOTS', assuming 1 slot")
+        return 1
+
+
+def get_thread_budget(job: TaskJob) -> dict[str, int]:
+    """
+    Get FFmpeg thread counts sharing the host's cores between encodes
+
+    Without a budget, every FFmpeg process spawns threads for every
+    core. Encoder threads are split between the job's output presets.
+
+    Returns:
+        dict[str, int]: Thread count kwargs for `get_ffmpeg_command`
+    """
+
+    if not settings.worker.thread_budgeting:
+        return {}
+
+    cores = os.cpu_count() or 1
+    slots = get_host_slots()
+    threads = max(1, cores // slots)
+
+    budget = dict(
+        decoder_threads=threads,
+        encoder_threads=max(1, threads // len(job.presets)),
+        filter_threads=threads,
     )
+
     logger.info(
-        f"Horizontal Flip: {job.source.h_flip}\n" f"Vertical Flip: {job.source.v_flip}"
+        f"[cyan]Thread budget: {threads} threads ({cores} cores / {slots} slots)"
     )
-    logger.info(f"Starting Timecode: {job.source.start_tc}")
+    logger.debug(f"[magenta] * {budget}")
+    return budget
 
-    # Get FFmpeg Command
-    ps = job.settings.proxy
 
-    ffmpeg_command = [
-        # INPUT
-        "ffmpeg",
-        "-y",  # Never prompt!
-        *ps.misc_args,
-        "-i",
-        job.source.file_path,
-        # VIDEO
-        "-c:v",
-        ps.codec,
-        "-profile:v",
-        ps.profile,
-        "-vsync",
-        "-1",  # Necessary to match VFR
-        # TODO: Format this better
-        # It's hard to format this. Every arg behind the -vf flag
-        # should be separated by a literal comma and NO SPACES to string them together as per ffmpeg syntax.
-        # Any optional args must provide their own literal commas so as not to leave them stray
-        # if disabled... Inline functions here are also confusing and "magical".
-        # But we don't want to run them queuer side, only on final queueables.
-        # labels: enhancement
-        # VIDEO FILTERS
-        "-vf",
-        f"scale=-2:{ps.vertical_res},"
-        f"scale={job.input_level}:out_range=limited, "
-        f"{ffmpeg_video_flip(job)}"
-        f"format={ps.pix_fmt}"
-        if ps.pix_fmt
-        else "",
-        # AUDIO
-        "-c:a",
-        ps.audio_codec,
-        "-ar",
-        ps.audio_samplerate,
-        # TIMECODE
-        "-timecode",
-        job.source.start_tc,
-        # FLAGS
-        "-movflags",
-        "+write_colr",
-        # OUTPUT
-        job.output_file_path,
-    ]
+def run_ffmpeg_with_fallback(
+    task,
+    job: TaskJob,
+    get_command: Callable[[list[str]], list[str]],
+    duration: float | None = None,
+    frame_range: tuple[int, int | None] = (0, None),
+) -> int | None:
+    """
+    Run an FFmpeg command with decoder args, falling back without them
+
+    Not every build of a decoder supports every option, so if FFmpeg
+    fails with decoder args the command is run again without them.
+
+    Args:
+        task: The bound Celery task to report progress to
+        job (TaskJob): The validated task job
+        get_command (Callable[[list[str]], list[str]]): Gets the FFmpeg
+            command for given decoder args
+        duration (float, optional): Seconds of media being encoded.
+        frame_range (tuple[int, int | None], optional): Start and end
+            frame of image sequences to feed.
+
+    Returns:
+        int | None: FFmpeg's exit code
+    """
+
+    decoder_args = get_job_decoder_args(job)
+    returncode = run_ffmpeg(task, job, get_command(decoder_args), duration, frame_range)
+
+    if returncode and decoder_args:
+        logger.warning(
+            f"[yellow]FFmpeg failed with decoder args {decoder_args}. Retrying without...[/]"
+        )
+        returncode = run_ffmpeg(task, job, get_command([]), duration, frame_range)
+
+    return returncode
+
+
+def run_ffmpeg(
+    task,
+    job: TaskJob,
+    ffmpeg_command: list[str],
+    duration: float | None = None,
+    frame_range: tuple[int, int | None] = (0, None),
+) -> int | None:
+    """
+    Run an FFmpeg command, reporting progress as task state
+
+    Args:
+        task: The bound Celery task to report progress to
+        job (TaskJob): The validated task job
+        ffmpeg_command (list[str]): The FFmpeg command to run
+        duration (float, optional): Duration of the media being encoded
+            in seconds. Taken from the probe manifest or probed from the
+            input if not provided.
+        frame_range (tuple[int, int | None], optional): Start and end
+            frame of image sequences to feed. Defaults to every frame.
+
+    Raises:
+        Reject: Raised without requeue if FFmpeg can't be prepared
+        Retry: Raised to requeue the task if FFmpeg stalls
+        FfmpegStallError: Raised if FFmpeg stalls with no retries left
+
+    Returns:
+        int | None: FFmpeg's exit code
+    """
+
+    ps = job.settings.proxy
 
     print()  # Newline
     logger.debug(f"[magenta]Running! FFmpeg command:[/]\n{' '.join(ffmpeg_command)}\n")
 
+    # Commands reading an image sequence from stdin need frames fed
+    feed = None
+    if job.input_is_sequence and "-" in ffmpeg_command:
+        frame_paths = job.get_frame_paths(*frame_range)
+        duration = duration or len(frame_paths) / job.source.fps
+        feed = partial(
+            feed_frames, frame_paths, workers=settings.worker.sequence_read_threads
+        )
+
+    # FfmpegProcess only probes if the manifest has no duration either
+    duration = duration or job.duration
+
     try:
         process = FfmpegProcess(
-            task_id=self.request.id,
-            channel_id=self.request.group,
+            task_id=task.request.id,
+            channel_id=task.request.group,
             command=[*ffmpeg_command],
             ffmpeg_loglevel=ps.ffmpeg_loglevel,
+            duration=duration,
+            stall_timeout=settings.worker.stall_timeout,
+            feed=feed,
         )
     except Exception as e:
         logger.error(f"[red]Error: {e}\nRejecting task to prevent requeuing.")
         raise Reject(e, requeue=False)
 
     # Create logfile
+    logfile_name = job.output_file_name
+    if job.chunk:
+        logfile_name += f"_chunk_{job.chunk.index:04d}"
+
     encode_log_dir = job.settings.paths.ffmpeg_logfile_dir
     os.makedirs(encode_log_dir, exist_ok=True)
-    logfile_path = os.path.normpath(
-        os.path.join(encode_log_dir, job.output_file_name + ".txt")
-    )
+    logfile_path = os.path.normpath(os.path.join(encode_log_dir, logfile_name + ".txt"))
     logger.debug(f"[magenta]Encoder logfile path: {logfile_path}[/]")
 
+    try:
+        return process.run(task, logfile=logfile_path)
+
+    except FfmpegStallError as e:
+        # Partial outputs would fail the retry's overwrite check.
+        # Checkpoint segments are kept, so checkpointed encodes resume.
+        for output_file_path in job.get_output_file_paths():
+            if os.path.exists(output_file_path):
+                os.remove(output_file_path)
+
+        if task.request.retries >= settings.worker.stall_retries:
+            logger.error(
+                f"[red]Killed stalled FFmpeg at {e.position:.3f} seconds. "
+                f"Giving up after {task.request.retries} retries.[/]"
+            )
+            raise
+
+        logger.error(
+            f"[red]Killed stalled FFmpeg at {e.position:.3f} seconds. "
+            f"Requeuing (attempt {task.request.retries + 1} of {settings.worker.stall_retries})...[/]"
+        )
+        raise task.retry(exc=e, max_retries=settings.worker.stall_retries)
+
+
+def join_segments(
+    task,
+    job: TaskJob,
+    segment_paths: list[str],
+    work_directory: str,
+    output_file_path: str,
+    trimmed: bool = False,
+):
+    """
+    Stream copy encoded segments into an output file
+
+    The output is joined inside the work directory, or local scratch if
+    outputs are staged, and moved into place. An interrupted join never
+    leaves a partial proxy at the output path.
+
+    Args:
+        task: The bound Celery task to report progress to
+        job (TaskJob): The validated task job
+        segment_paths (list[str]): Segments in source order
+        work_directory (str): Directory containing the segments
+        output_file_path (str): Where to move the joined output
+        trimmed (bool, optional): Tag the output as a trim-aware proxy,
+        so it's never derived from. Defaults to False.
+
+    Raises:
+        RuntimeError: Raised if FFmpeg fails to join the segments
+        FileNotFoundError: Raised if the joined output wasn't written
+
+    Returns:
+        Future: Resolves once the output is verified in place
+    """
+
+    name, ext = os.path.splitext(os.path.basename(output_file_path))
+
+    # Concat demuxer resolves relative paths against the list file
+    concat_list_path = os.path.join(work_directory, f"{name}.txt")
+    with open(concat_list_path, "w") as f:
+        f.writelines(f"file '{os.path.basename(x)}'\n" for x in segment_paths)
+
+    joined_file_path = staging.get_output_staging_path(output_file_path)
+    if joined_file_path == output_file_path:
+        joined_file_path = os.path.join(work_directory, f"joined_{name}{ext}")
+
+    ps = job.settings.proxy
+    ffmpeg_command = [
+        "ffmpeg",
+        "-y",  # Never prompt!
+        *ps.misc_args,
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        concat_list_path,
+        "-map",
+        "0:v",
+        "-map",
+        "0:a?",
+        "-c",
+        "copy",
+        "-timecode",
+        job.source.start_tc,
+        *(["-metadata", f"comment={TRIMMED_COMMENT}"] if trimmed else []),
+        "-movflags",
+        "+write_colr",
+        joined_file_path,
+    ]
+
+    logger.info(f"[yellow]Joining {len(segment_paths)} segments...[/]")
+    returncode = run_ffmpeg(
+        task, job, ffmpeg_command, duration=job.source.frames / job.source.fps
+    )
+
+    if returncode:
+        # Never publish a partial join
+        if os.path.exists(joined_file_path):
+            os.remove(joined_file_path)
+        raise RuntimeError(
+            f"FFmpeg exited with code {returncode} joining segments of '{job.source.file_name}'"
+        )
+
+    if not os.path.exists(joined_file_path):
+        raise FileNotFoundError(
+            f"Couldn't join segments of '{job.source.file_name}' at '{joined_file_path}'"
+        )
+
+    return staging.publish(joined_file_path, output_file_path)
+
+
+def read_segment_list(
+    job: TaskJob, attempt_start: int, preset_index: int
+) -> list[tuple[str, int]]:
+    """
+    Read an encode attempt's listed segments for an output preset
+
+    Returns:
+        list[tuple[str, int]]: Segment paths and the frames they end at,
+            up to the first missing segment. Empty if nothing is listed.
+    """
+
+    directory = job.checkpoint_directory
+    list_path = os.path.join(
+        directory, f"segments_{attempt_start:08d}_{preset_index}.csv"
+    )
+    if not os.path.exists(list_path):
+        return []
+
+    entries = []
+    with open(list_path, newline="") as f:
+        for file_name, _, end in csv.reader(f):
+            segment_path = os.path.join(directory, file_name)
+            if not os.path.exists(segment_path):
+                break
+            end_frame = attempt_start + round(float(end) * job.source.fps)
+            entries.append((segment_path, end_frame))
+    return entries
+
+
+def get_checkpoints(job: TaskJob) -> tuple[list[list[str]], int]:
+    """
+    Get completed checkpoint segments and the frame to resume from
+
+    Each encode attempt writes a segment list per output preset, named
+    after the frame it started from. FFmpeg's segment muxer only lists
+    segments once they're complete, so any unlisted segment was
+    interrupted. Outputs are kept in step: segments beyond those
+    completed by every output are removed.
+
+    Returns:
+        tuple[list[list[str]], int]: Completed segment paths per preset,
+            frame to resume from
+    """
+
+    directory = job.checkpoint_directory
+    completed: list[list[str]] = [[] for _ in job.presets]
+    resume_frame = 0
+
+    attempts = sorted(
+        {
+            int(os.path.basename(x)[9:17])
+            for x in glob(os.path.join(directory, "segments_*_*.csv"))
+        }
+    )
+
+    for attempt_start in attempts:
+        # Later attempts supersede anything after their start
+        if attempt_start != resume_frame:
+            logger.warning(
+                f"[yellow]Ignoring out of sequence checkpoints from frame {attempt_start}"
+            )
+            continue
+
+        attempt = [
+            read_segment_list(job, attempt_start, x) for x in range(len(job.presets))
+        ]
+
+        count = min(len(x) for x in attempt)
+        if not count:
+            continue
+
+        for preset_index, entries in enumerate(attempt):
+            completed[preset_index].extend(x[0] for x in entries[:count])
+        resume_frame = attempt[0][count - 1][1]
+
+    keep = {x for segments in completed for x in segments}
+    for segment in glob(os.path.join(directory, "segment_*.*")):
+        if segment not in keep:
+            logger.debug(f"[magenta] * Removing incomplete segment '{segment}'")
+            os.remove(segment)
+
+    return completed, resume_frame
+
+
+def encode_checkpointed(task, job: TaskJob, interval: int):
+    """
+    Encode the job's source media as resumable checkpoint segments
+
+    Segments are written to a shared checkpoint directory, so a
+    redelivered task (lost worker, reboot) only encodes the missing tail
+    before joining.
+
+    Args:
+        task: The bound Celery task to report progress to
+        job (TaskJob): The validated task job
+        interval (int): Seconds of media per checkpoint segment
+
+    Raises:
+        RuntimeError: Raised if FFmpeg exits before encoding completely
+
+    Returns:
+        list[Future]: Joined output uploads, resolved once in place
+    """
+
+    os.makedirs(job.checkpoint_directory, exist_ok=True)
+    completed, resume_frame = get_checkpoints(job)
+
+    if resume_frame < job.source.frames:
+        if completed[0]:
+            logger.info(
+                f"[green]Resuming from checkpoint {len(completed[0])} at frame {resume_frame}[/]"
+            )
+
+        outputs = []
+        for preset_index, output_file_path in enumerate(job.get_output_file_paths()):
+            ext = os.path.splitext(output_file_path)[1]
+            segment_list_path = os.path.join(
+                job.checkpoint_directory,
+                f"segments_{resume_frame:08d}_{preset_index}.csv",
+            )
+            outputs.append(
+                (
+                    os.path.join(
+                        job.checkpoint_directory, f"segment_{preset_index}_%05d{ext}"
+                    ),
+                    [
+                        "-force_key_frames",
+                        f"expr:gte(t,n_forced*{interval})",
+                        "-f",
+                        "segment",
+                        "-segment_time",
+                        str(interval),
+                        "-segment_start_number",
+                        str(len(completed[0])),
+                        "-segment_list",
+                        segment_list_path,
+                        "-segment_list_type",
+                        "csv",
+                        "-reset_timestamps",
+                        "1",
+                        "-segment_format_options",
+                        "movflags=+write_colr",
+                    ],
+                )
+            )
+
+        remaining_seconds = (job.source.frames - resume_frame) / job.source.fps
+
+        thread_budget = get_thread_budget(job)
+
+        def get_command(decoder_args: list[str]) -> list[str]:
+            return get_ffmpeg_command(
+                job,
+                outputs,
+                input_args=get_seek_args(job, resume_frame) if resume_frame else [],
+                muxer_args=[],
+                decoder_args=decoder_args,
+                **thread_budget,
+            )
+
+        if run_ffmpeg_with_fallback(
+            task,
+            job,
+            get_command,
+            duration=remaining_seconds,
+            frame_range=(resume_frame, None),
+        ):
+            raise RuntimeError(
+                f"FFmpeg exited before encoding '{job.source.file_name}' completely. "
+                "Checkpoints are kept for the next attempt."
+            )
+
+        completed, resume_frame = get_checkpoints(job)
+
+    uploads = [
+        join_segments(task, job, x, job.checkpoint_directory, y)
+        for x, y in zip(completed, job.get_output_file_paths())
+    ]
+
+    # Keep checkpoints until uploads succeed, so a failed one can rejoin
+    def remove_checkpoints(failed: list[int]):
+        if not failed:
+            shutil.rmtree(job.checkpoint_directory, ignore_errors=True)
+
+    staging.on_uploaded(uploads, remove_checkpoints)
+    return uploads
+
+
+def log_job_details(task, job: TaskJob):
+    """Print new job header and job details to worker output"""
+
+    print("\n")
+    console.rule("[green]Received proxy encode job :clapper:[/]", align="left")
+    print("\n")
+
+    logger.info(
+        f"[magenta bold]Job: [/]{task.request.id}\n"
+        f"Input File: '{job.input_file_path}'"
+    )
+
+    ###################################################################
+
+    # Log job details
+    logger.info(f"Output File: '{job.output_file_path}'\n")
+    logger.info(
+        f"Source Resolution: {job.source.resolution[0]} x {job.source.resolution[1]}"
+    )
+    logger.info(
+        f"Horizontal Flip: {job.source.h_flip}\n" f"Vertical Flip: {job.source.v_flip}"
+    )
+    logger.info(f"Starting Timecode: {job.source.start_tc}")
+
+    if job.chunk:
+        logger.info(
+            f"Chunk: {job.chunk.index + 1} of {job.chunk.count} "
+            f"(frames {job.chunk.start_frame} - {job.chunk.end_frame})"
+        )
+
+
+def encode_job(
+    task, job: TaskJob, checkpoint_interval: int = 0, duration: float | None = None
+) -> list[Future]:
+    """
+    Encode the job's source media to all output presets
+
+    Args:
+        task: The bound Celery task to report progress to
+        job (TaskJob): The validated task job
+        checkpoint_interval (int, optional): Seconds of media per
+            checkpoint segment. 0 disables.
+        duration (float, optional): Duration of the source media in
+            seconds. Probed from the input if not provided.
+
+    Raises:
+        RuntimeError: Raised if FFmpeg fails
+
+    Returns:
+        list[Future]: Output uploads, resolved once verified in place
+    """
+
+    if checkpoint_interval and not job.remux:
+        return encode_checkpointed(task, job, checkpoint_interval)
+
+    # Staged outputs are encoded to local scratch and uploaded after
+    output_file_paths = job.get_output_file_paths()
+    staged_file_paths = [staging.get_output_staging_path(x) for x in output_file_paths]
+
+    if job.remux:
+        logger.info("[green]Source meets proxy spec, remuxing[/]")
+        returncode = run_ffmpeg(
+            task, job, get_remux_command(job, staged_file_paths[0]), duration
+        )
+    else:
+        outputs = [(x, []) for x in staged_file_paths]
+        thread_budget = get_thread_budget(job)
+        returncode = run_ffmpeg_with_fallback(
+            task,
+            job,
+            lambda decoder_args: get_ffmpeg_command(
+                job, outputs, decoder_args=decoder_args, **thread_budget
+            ),
+            duration,
+        )
+
+    if returncode:
+        raise RuntimeError(f"FFmpeg exited with code {returncode}")
+
+    return [staging.publish(x, y) for x, y in zip(staged_file_paths, output_file_paths)]
+
+
+class BundleError(Exception):
+    """
+    Raised once every clip in a bundle has run, if any failed
+
+    Carries every clip's result, so the queuer can count clips
+    individually. Arguments are JSON serialisable, so the error survives
+    the result backend.
+    """
+
+    def __init__(self, results: list[str], failed: list[int]):
+        self.results = results
+        self.failed = failed
+        super().__init__(results, failed)
+
+    def __str__(self) -> str:
+        return f"{len(self.failed)} of {len(self.results)} bundled clips failed: " + (
+            ", ".join(self.results[i] for i in self.failed)
+        )
+
+
+class BundleProgress:
+    """
+    Report a bundled clip's encode progress as the bundle's progress
+
+    Wraps the bound Celery task, so anything else is passed through.
+    """
+
+    def __init__(self, task, index: int, count: int):
+        self._task = task
+        self.index = index
+        self.count = count
+
+    def __getattr__(self, name):
+        return getattr(self._task, name)
+
+    def update_state(self, state: str, meta: dict):
+        clip_percent = meta.get("percent", 0)
+        self._task.update_state(
+            state=state,
+            meta={
+                "percent": (self.index + clip_percent / 100) / self.count * 100,
+                "clip": self.index,
+                "clip_percent": clip_percent,
+            },
+        )
+
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    track_started=True,
+    prefetch_limit=1,
+    reject_on_worker_lost=True,
+    queue=celery_queue,
+)
+def encode_proxy(self, job_dict: dict) -> str:
+    """
+    Celery task to encode proxy media using parameters in job argument
+    and user-defined settings
+    """
+
+    job = get_task_job(job_dict)
+
+    # Create proxy output directories
+    for output_file_path in job.get_output_file_paths():
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+
+    log_job_details(self, job)
+
     # Run encode job
     logger.info("[yellow]Encoding...[/]")
 
     try:
-        process.run(self, logfile=logfile_path)
+        uploads = encode_job(self, job, settings.worker.checkpoint_interval)
+
+    except (Reject, Retry, SoftTimeLimitExceeded, FfmpegStallError):
+        raise
 
     except Exception as e:
+        # Failed encodes must fail the task, never report success
         logger.exception(f"[red] :warning: Couldn't encode proxy.[/]\n{e}")
+        raise
+
+    # Uploads finish after the task returns and report separately
+    staging.report_uploads(self, uploads)
+    return f"{job.source.file_name} encoded successfully"
+
+
+def report_bundle_uploads(
+    task,
+    job_dicts: list[dict],
+    results: list[str],
+    failed: list[int],
+    clip_uploads: dict[int, list[Future]],
+):
+    """
+    Report a bundle's uploads once they finish, after the task returns
 
+    Failed clip uploads fail the report with a `BundleError`. It lists
+    clips that failed to encode too, so it supersedes the task's error.
+
+    Args:
+        task: The bound bundle task
+        job_dicts (list[dict]): The bundle's job dicts
+        results (list[str]): A result for each clip
+        failed (list[int]): Indexes of clips that failed to encode
+        clip_uploads (dict[int, list[Future]]): Uploads by clip index
+    """
+
+    uploads = [x for i in clip_uploads for x in clip_uploads[i]]
+    upload_clips = [i for i in clip_uploads for _ in clip_uploads[i]]
+
+    def get_upload_error(failed_uploads: list[int]) -> BundleError:
+        upload_results = list(results)
+        for x in failed_uploads:
+            i = upload_clips[x]
+            file_name = job_dicts[i]["source"]["file_name"]
+            upload_results[i] = f"{file_name} failed: {uploads[x].exception()}"
+
+        failed_clips = {upload_clips[x] for x in failed_uploads}
+        return BundleError(upload_results, sorted(failed_clips.union(failed)))
+
+    staging.report_uploads(task, uploads, get_error=get_upload_error)
+
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    track_started=True,
+    prefetch_limit=1,
+    reject_on_worker_lost=True,
+    queue=celery_queue,
+)
+def encode_bundle(self, job_dicts: list[dict]) -> list[str]:
+    """
+    Celery task to encode several short clips sequentially
+
+    Bundling short clips saves per-task overhead: delivery, worker
+    process restarts and probing for duration. Clips succeed or fail
+    individually, but any failure fails the task once every clip has
+    run. Clips already encoded by an earlier attempt are skipped on
+    retry, whether their outputs are in place or still uploading.
+    Staged outputs upload while later clips encode and after it returns.
+
+    Raises:
+        BundleError: Raised with every clip's result if any clip failed
+
+    Returns:
+        list[str]: A result for each clip
+    """
+
+    results = []
+    failed = []
+    clip_uploads = {}
+    for i, job_dict in enumerate(job_dicts):
+        file_name = job_dict["source"]["file_name"]
+
+        try:
+            job = get_task_job(job_dict)
+
+            # Report uploads still in flight from an earlier attempt
+            uploading = [staging.get_upload(x) for x in job.get_output_file_paths()]
+            if uploading := [x for x in uploading if x]:
+                clip_uploads[i] = uploading
+                results.append(f"{file_name} already encoded")
+                continue
+
+            for output_file_path in job.get_output_file_paths():
+                os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+
+            log_job_details(self, job)
+            logger.info(f"[yellow]Encoding clip {i + 1} of {len(job_dicts)}...[/]")
+
+            # Uploads continue while the next clip encodes
+            clip_uploads[i] = encode_job(
+                BundleProgress(self, i, len(job_dicts)),
+                job,
+                duration=job.source.frames / job.source.fps,
+            )
+
+        except (Retry, SoftTimeLimitExceeded):
+            raise
+
+        except FileExistsError:
+            results.append(f"{file_name} already encoded")
+            continue
+
+        except Exception as e:
+            logger.exception(f"[red] :warning: Couldn't encode proxy.[/]\n{e}")
+            results.append(f"{file_name} failed: {e}")
+            failed.append(i)
+            continue
+
+        results.append(f"{file_name} encoded successfully")
+
+    report_bundle_uploads(self, job_dicts, results, failed, clip_uploads)
+
+    if failed:
+        raise BundleError(results, sorted(failed))
+
+    return results
+
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    track_started=True,
+    prefetch_limit=1,
+    reject_on_worker_lost=True,
+    queue=celery_queue,
+)
+def encode_chunk(self, job_dict: dict) -> str:
+    """
+    Celery task to encode a single time-range chunk of source media
+
+    Chunks are encoded to a shared chunk directory beside the final
+    output and joined by the `concat_chunks` chord callback once all are
+    finished. A failed chunk is removed and fails the task, so the chord
+    never joins it.
+    """
+
+    job = get_task_job(job_dict)
+    assert job.chunk
+
+    os.makedirs(job.chunk_directory, exist_ok=True)
+
+    log_job_details(self, job)
+
+    # Seek before input for speed, count frames for accuracy
+    chunk_frames = job.chunk.end_frame - job.chunk.start_frame
+    chunk_seconds = chunk_frames / job.source.fps
+
+    output_args = ["-frames:v", str(chunk_frames), "-t", f"{chunk_seconds:.6f}"]
+    outputs = [
+        (job.get_chunk_file_path(job.chunk.index, i), output_args)
+        for i in range(len(job.presets))
+    ]
+
+    thread_budget = get_thread_budget(job)
+
+    def get_command(decoder_args: list[str]) -> list[str]:
+        return get_ffmpeg_command(
+            job,
+            outputs,
+            input_args=get_seek_args(job, job.chunk.start_frame),
+            # Trim-aware jobs fill their unused ranges with black frames
+            fill=chunk_seconds if job.chunk.fill else None,
+            decoder_args=decoder_args,
+            **thread_budget,
+        )
+
+    logger.info("[yellow]Encoding chunk...[/]")
+    if job.chunk.fill:
+        # Source only provides audio, nothing to decode cheaper
+        returncode = run_ffmpeg(self, job, get_command([]), duration=chunk_seconds)
+    else:
+        returncode = run_ffmpeg_with_fallback(
+            self,
+            job,
+            get_command,
+            duration=chunk_seconds,
+            frame_range=(job.chunk.start_frame, job.chunk.end_frame),
+        )
+
+    if returncode:
+        # A truncated chunk would be joined into a short proxy
+        for chunk_file_path, _ in outputs:
+            if os.path.exists(chunk_file_path):
+                os.remove(chunk_file_path)
+        raise RuntimeError(
+            f"FFmpeg exited with code {returncode} encoding chunk "
+            f"{job.chunk.index + 1} of {job.chunk.count}"
+        )
+
+    return f"{job.source.file_name} chunk {job.chunk.index + 1} of {job.chunk.count} encoded successfully"
+
+
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    track_started=True,
+    prefetch_limit=1,
+    reject_on_worker_lost=True,
+    queue=celery_queue,
+)
+def concat_chunks(self, job_dict: dict) -> str:
+    """
+    Celery chord callback to join encoded chunks into a single proxy
+
+    Chunks are stream copied, so this is limited by disk speed rather
+    than CPU. The chunk directory is removed once the proxy is in place.
+    """
+
+    job = get_task_job(job_dict)
+    chunk_count = len(job_dict["job"]["chunks"])
+    trimmed = any(x["fill"] for x in job_dict["job"]["chunks"])
+
+    uploads = []
+    for preset_index, output_file_path in enumerate(job.get_output_file_paths()):
+        chunk_paths = [
+            job.get_chunk_file_path(i, preset_index) for i in range(chunk_count)
+        ]
+        missing = [x for x in chunk_paths if not os.path.exists(x)]
+        if missing:
+            raise FileNotFoundError(
+                f"Can't join '{job.source.file_name}', {len(missing)} of {chunk_count} chunks are missing"
+            )
+
+        uploads.append(
+            join_segments(
+                self,
+                job,
+                chunk_paths,
+                job.chunk_directory,
+                output_file_path,
+                trimmed=trimmed,
+            )
+        )
+
+    # Keep chunks until uploads succeed, so a failed one can rejoin
+    staging.report_uploads(
+        self,
+        uploads,
+        on_success=partial(shutil.rmtree, job.chunk_directory, ignore_errors=True),
+    )
     return f"{job.source.file_name} encoded successfully"
+
+
+@celery_app.task(bind=True, queue=celery_queue)
+def ping(self, sent: float) -> dict:
+    """
+    Celery task reporting how long it took to start, for benchmarks
+
+    Args:
+        sent (float): Epoch time the task was queued at
+
+    Returns:
+        dict: Start latency in seconds and details of the worker process
+    """
+
+    return {
+        "latency": time.time() - sent,
+        "worker": self.request.hostname,
+        "pid": os.getpid(),
+        "warm": settings.worker.warm,
+    }
@@ -12,6 +12,7 @@ from rich.console import Console
 from rich.prompt import Confirm
 from rich.syntax import Syntax
 
+from proxima.app.scheduling import QueueOrder
 from proxima.settings import (
     default_settings_file,
     dotenv_settings_file,
@@ -22,6 +23,8 @@ from proxima.settings import (
 cli_app = typer.Typer()
 config_app = typer.Typer()
 cli_app.add_typer(config_app, name="config")
+cache_app = typer.Typer(help="Manage the media probe cache")
+cli_app.add_typer(cache_app, name="cache")
 
 console = Console()
 
@@ -68,7 +71,18 @@ def status():
 
 
 @cli_app.command()
-def queue():
+def queue(
+    order: QueueOrder = typer.Option(
+        QueueOrder.lpt,
+        "--order",
+        help="Submit jobs in timeline order, longest first (lpt) or shortest first (spt)",
+    ),
+    background: bool = typer.Option(
+        False,
+        "--background",
+        help="Queue in the lowest priority lane, behind all interactive work",
+    ),
+):
     """
     Queue proxies from the currently open
     DaVinci Resolve timeline
@@ -84,7 +98,7 @@ def queue():
 
     from proxima.cli import queue
 
-    queue.main()
+    queue.main(order, background)
 
 
 @cli_app.command()
@@ -370,6 +384,75 @@ def reset_all_configuration(
     reset_configuration(config_type=RWConfigTypes.toml, force=True)
 
 
+@cache_app.command("stats")
+def cache_stats():
+    """
+    Show the size and hit rate of the probe cache.
+
+    Hit counts are this machine's since its cache was last cleared.
+    """
+
+    from datetime import datetime
+
+    from rich.table import Table
+
+    from proxima.celery.ffmpeg import probe_cache
+
+    stats = probe_cache.get_stats()
+    lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+    hit_rate = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else 0
+
+    shared_entries = stats["shared_entries"]
+    oldest = stats["oldest"]
+
+    table = Table(title="Probe cache", show_header=False)
+    table.add_row("Local entries", str(stats["local_entries"]))
+    table.add_row("Local size", f"{stats['local_size'] / 1024**2:.1f} MB")
+    table.add_row(
+        "Oldest entry",
+        datetime.fromtimestamp(oldest).strftime("%Y-%m-%d %H:%M") if oldest else "-",
+    )
+    table.add_row(
+        "Shared entries",
+        "unavailable" if shared_entries is None else str(shared_entries),
+    )
+    table.add_row("Local hits", str(stats["local_hits"]))
+    table.add_row("Shared hits", str(stats["shared_hits"]))
+    table.add_row("Misses", str(stats["misses"]))
+    table.add_row("Hit rate", f"{hit_rate:.1%}")
+    console.print(table)
+
+
+@cache_app.command("clear")
+def cache_clear(
+    local: bool = typer.Option(True, help="Clear this machine's cache"),
+    shared: bool = typer.Option(True, help="Clear the cache shared through the broker"),
+    force: bool = typer.Option(
+        False, "--force", help="Bypass any confirmation prompts.", show_default=False
+    ),
+):
+    """
+    Clear cached probe results.
+
+    Sources are probed again the next time they're queued.
+    Clearing the shared cache affects every machine.
+    """
+
+    if not force and shared:
+        if not Confirm.ask(
+            "[yellow]The shared probe cache is used by every queuer and worker.[/]\n"
+            "Are you sure you want to clear it?"
+        ):
+            return
+
+    from proxima.celery.ffmpeg import probe_cache
+
+    local_removed, shared_removed = probe_cache.clear(local=local, shared=shared)
+    print(
+        f"[cyan]Cleared {local_removed} local and {shared_removed} shared probe results"
+    )
+
+
 def main():
     fig = Figlet(font="rectangles")
     print(fig.renderText("proxima"))
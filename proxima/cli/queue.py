@@ -1,6 +1,8 @@
 import logging
 
-from celery import group
+from celery import chord, group
+from celery.canvas import Signature
+from celery.result import GroupResult
 from pydavinci import davinci
 from pydavinci.exceptions import TimelineNotFound
 from rich import print
@@ -9,8 +11,24 @@ from rich.panel import Panel
 from proxima import ProxyLinker, core, shared
 from proxima.app import resolve
 from proxima.app.checks import AppStatus
-from proxima.celery.tasks import encode_proxy
+from proxima.app.scheduling import (
+    DEFAULT_PRIORITY,
+    DRAFT_PRIORITIES,
+    FULL_PRIORITIES,
+    INTERACTIVE_PRIORITIES,
+    QueueOrder,
+    order_jobs,
+    set_priorities,
+)
+from proxima.celery.tasks import (
+    concat_chunks,
+    encode_bundle,
+    encode_chunk,
+    encode_proxy,
+)
 from proxima.settings.manager import settings
+from proxima.types.batch import Batch
+from proxima.types.job import Playhead
 
 core.install_rich_tracebacks()
 
@@ -18,30 +36,227 @@ logger = logging.getLogger("proxima")
 logger.setLevel(settings.app.loglevel)
 
 
-def queue_batch(batch: list):
-    """Block until all queued tasks finish, notify results."""
+def get_time_limits(frames: int, fps: float) -> dict[str, int]:
+    """
+    Get soft and hard time limits for a task encoding the given frames
+
+    Limits scale with media duration, so long encodes survive
+    and short hung encodes fail fast.
+
+    Returns:
+        dict[str, int]: Celery task options, empty if limits are off
+    """
+
+    tl = settings.time_limits
+    if not tl.enabled:
+        return {}
+
+    expected_seconds = frames / fps / tl.encode_speed
+    soft_time_limit = max(tl.minimum, int(expected_seconds * tl.safety_multiplier))
+
+    return dict(
+        soft_time_limit=soft_time_limit,
+        time_limit=soft_time_limit + tl.grace,
+    )
+
+
+def get_signature(job: dict) -> Signature:
+    """
+    Wrap a job in a Celery task signature
+
+    Chunked jobs are wrapped in a chord: chunks are encoded in parallel
+    by any available worker and joined by a concat callback.
+    Every task is queued in the job's priority lane.
+    """
+
+    fps = job["source"]["fps"]
+    time_limits = get_time_limits(job["source"]["frames"], fps)
+    logger.debug(
+        f"[magenta] * Time limits for '{job['source']['file_name']}': {time_limits}"
+    )
+    priority = job.get("priority", DEFAULT_PRIORITY)
+
+    chunks = job["job"]["chunks"]
+    if not chunks:
+        return encode_proxy.s(job).set(**time_limits, priority=priority)
+
+    logger.debug(
+        f"[magenta] * Queuing '{job['source']['file_name']}' as {len(chunks)} chunks"
+    )
+    return chord(
+        [
+            encode_chunk.s({**job, "chunk": x}).set(
+                **get_time_limits(x["end_frame"] - x["start_frame"], fps),
+                priority=priority,
+            )
+            for x in chunks
+        ],
+        concat_chunks.si(job).set(**time_limits, priority=priority),
+    )
+
+
+def get_bundle_signature(jobs: list[dict]) -> Signature:
+    """Wrap short jobs in one bundle task signature, encoded in turn"""
+
+    if len(jobs) == 1:
+        return get_signature(jobs[0])
+
+    logger.debug(f"[magenta] * Queuing bundle of {len(jobs)} clips")
+    frames = sum(x["source"]["frames"] for x in jobs)
+    fps = min(x["source"]["fps"] for x in jobs)
+    priority = jobs[0].get("priority", DEFAULT_PRIORITY)
+    return encode_bundle.s(jobs).set(**get_time_limits(frames, fps), priority=priority)
+
+
+def get_signatures(batch: list) -> list[Signature]:
+    """
+    Wrap every job in the batch in a Celery task signature
+
+    Short jobs are packed into bundles of about `bundle_duration`
+    seconds. Only jobs in the same priority lane are bundled together.
+    """
+
+    bs = settings.bundling
+
+    def get_duration(job: dict) -> float:
+        return job["source"]["frames"] / job["source"]["fps"]
+
+    signatures = []
+    bundles: dict[int, tuple[list[dict], float]] = {}
+
+    for job in batch:
+        if (
+            not bs.enabled
+            or job["job"]["chunks"]
+            or get_duration(job) > bs.clip_duration
+        ):
+            signatures.append(get_signature(job))
+            continue
+
+        priority = job.get("priority", DEFAULT_PRIORITY)
+        bundle, bundle_duration = bundles.get(priority, ([], 0.0))
+        bundle.append(job)
+        bundle_duration += get_duration(job)
+
+        if bundle_duration >= bs.bundle_duration:
+            signatures.append(get_bundle_signature(bundle))
+            bundles.pop(priority, None)
+        else:
+            bundles[priority] = (bundle, bundle_duration)
+
+    for bundle, _ in bundles.values():
+        signatures.append(get_bundle_signature(bundle))
+
+    return signatures
+
+
+def submit_batch(batch: list) -> GroupResult:
+    """Queue every job in the batch as one group, without waiting"""
 
     logger.info("[cyan]Queuing batch...")
 
     # Wrap task objects in Celery task function
-    callable_tasks = [encode_proxy.s(x) for x in batch]
+    callable_tasks = get_signatures(batch)
 
     # Create task group to retrieve job results as batch
     task_group = group(callable_tasks)
 
-    progress = shared.ProgressTracker()
-
     # Queue job
     results = task_group.apply_async(expires=settings.broker.job_expires)
     logger.debug(f"[magenta] * Queued batch with ID {results}[/]")
+    return results
+
+
+def queue_batch(batch: list):
+    """Block until all queued tasks finish, notify results."""
+
+    results = submit_batch(batch)
 
     # report progress is blocking!
-    final_results = progress.report_progress(results)
+    final_results = shared.ProgressTracker().report_progress(results)
     return final_results
 
 
-def main():
-    """Main function"""
+def link_drafts(batch: Batch, draft_batch: Batch, draft_results: GroupResult):
+    """
+    Wait for drafts to finish and link them, tracking them in the batch
+
+    Drafts are best effort, full quality proxies are linked regardless.
+    """
+
+    shared.ProgressTracker().report_progress(draft_results)
+    _ = draft_results.join(propagate=False)  # Must always call join
+
+    if draft_results.failed():
+        logger.warning("[yellow]Some drafts failed to encode")
+
+    draft_linker = ProxyLinker(draft_batch.batch, drafts=True)
+
+    try:
+        draft_linker.batch_link()
+
+    except Exception:
+        logger.warning("[yellow]Couldn't link drafts:[/]\n", exc_info=True)
+
+    batch.track_linked_drafts(draft_linker.link_success)
+    core.notify(f"Linked {len(draft_linker.link_success)} drafts")
+
+
+def queue_jobs(
+    batch: Batch,
+    order: QueueOrder,
+    playhead: Playhead | None,
+    background: bool = False,
+) -> GroupResult:
+    """
+    Queue the batch in priority lanes and wait for it to finish
+
+    With drafts enabled, drafts are linked as soon as they finish.
+
+    Args:
+        batch (Batch): The batch to queue
+        order (QueueOrder): Order to submit full quality jobs in
+        playhead (Playhead | None): Playhead position and active track
+        background (bool, optional): Queue in the background lane.
+            Defaults to False.
+
+    Returns:
+        GroupResult: Results of the full quality jobs
+    """
+
+    def prioritise(
+        jobs: list[dict], lanes: range = INTERACTIVE_PRIORITIES
+    ) -> list[dict]:
+        set_priorities(jobs, playhead, settings.priority, background, lanes)
+        return jobs
+
+    if not settings.drafts.enabled:
+        return queue_batch(prioritise(order_jobs(batch.hashable, order)))
+
+    # Drafts queue first in more urgent lanes,
+    # so workers encode them before any full quality proxy
+    draft_batch = batch.get_drafts()
+    draft_results = submit_batch(prioritise(draft_batch.hashable, DRAFT_PRIORITIES))
+    full_results = submit_batch(
+        prioritise(order_jobs(batch.hashable, order), FULL_PRIORITIES)
+    )
+
+    link_drafts(batch, draft_batch, draft_results)
+    return shared.ProgressTracker().report_progress(full_results)
+
+
+def main(order: QueueOrder = QueueOrder.lpt, background: bool = False):
+    """
+    Main function
+
+    Args:
+        order (QueueOrder, optional): Order to submit jobs in. Drafts
+            are always submitted in timeline order. Defaults to longest
+            processing time first.
+        background (bool, optional): Queue in the background lane,
+            behind all interactive work, e.g. for whole project queues.
+            Defaults to False.
+    """
 
     r_ = davinci.Resolve()
 
@@ -52,7 +267,8 @@ def main():
         core.app_exit(1, -1)
 
     media_pool_items = resolve.get_media_pool_items(track_items)
-    batch = resolve.generate_batch(media_pool_items, settings)
+    timeline_usage = resolve.get_timeline_usage(r_.active_timeline)
+    batch = resolve.generate_batch(media_pool_items, settings, timeline_usage)
 
     # 'Remove healthy' runs twice because 'Handle Existing Unlinked'
     # can make media healthy, ut we also don't want it to
@@ -87,24 +303,40 @@ def main():
 
     core.notify(f"Started encoding job '{r_.project.name} - {r_.active_timeline.name}'")
 
+    # Clips near the playhead queue in more urgent lanes
+    playhead = None
+    if not background:
+        playhead = resolve.get_playhead(r_.active_timeline, timeline_usage)
+
     # Queue tasks to workers and track task progress
-    results = queue_batch(batch.hashable)
+    results = queue_jobs(batch, order, playhead, background)
 
-    if results.failed():
-        fail_message = "Some videos failed to encode!"
+    # Bundled clips are counted individually
+    succeeded, failed, _ = shared.ProgressTracker.get_clip_counts(results.results)
+
+    if failed:
+        fail_message = f"{failed} videos failed to encode!"
         print(f"[red]{fail_message}[/]")
         core.notify(fail_message)
 
     # Notify complete
-    complete_message = f"Completed encoding {results.completed_count()} proxies."
+    complete_message = f"Completed encoding {succeeded} proxies."
     print(f"[green]{complete_message}[/]")
     print("\n")
 
     core.notify(complete_message)
 
-    _ = results.join()  # Must always call join, or results don't expire
+    # Must always call join, or results don't expire.
+    # Failed encodes are reported above, successful ones still link
+    _ = results.join(propagate=False)
+
+    # Only replace drafts that are still linked
+    relinkable = batch.get_relinkable()
+    if not relinkable:
+        print("[yellow]No proxies left to link[/]")
+        core.app_exit(0)
 
-    proxy_linker = ProxyLinker(batch.batch)
+    proxy_linker = ProxyLinker(relinkable)
 
     try:
         proxy_linker.batch_link()
@@ -42,6 +42,10 @@ class App(BaseModel):
         False,
         description="Enable/disable version constrained queuer/worker compatibility. Keep it enabled unless you're sure!",
     )
+    probe_backend: str = Field(
+        "auto",
+        description="Media probing backend: 'pyav' (in process, needs 'pip install av'), 'ffprobe' or 'auto'",
+    )
 
     @validator("loglevel")
     def must_be_valid_loglevel(cls, v):
@@ -52,6 +56,15 @@ class App(BaseModel):
             )
         return v
 
+    @validator("probe_backend")
+    def must_be_valid_probe_backend(cls, v):
+        valid_backends = ["auto", "pyav", "ffprobe"]
+        if v not in valid_backends:
+            raise ValueError(
+                f"'{v}' is not a valid probe backend. Choose from [cyan]{', '.join(valid_backends)}[/]"
+            )
+        return v
+
 
 class Paths(BaseModel):
     proxy_root: str = Field(
@@ -75,6 +88,35 @@ class Paths(BaseModel):
         return v
 
 
+class Preset(BaseModel):
+    nickname: str = Field(
+        ..., description="Encoding preset nickname for easy reference"
+    )
+    codec: str = Field(..., description="Ffmpeg supported codec for transcoding")
+    vertical_res: str = Field(
+        ...,
+        description="Target vertical resolution in pixels (aspect ratio is automatically preserved)",
+    )
+    profile: str = Field(..., description="Ffmpeg profile for given codec")
+    pix_fmt: str = Field(..., description="Ffmpeg pixel format for given codec")
+    audio_codec: str = Field(
+        ...,
+        description="Ffmpeg supported audio codec for given format/container",
+    )
+    audio_samplerate: str = Field(
+        ...,
+        description="Ffmpeg supported audio samplerate for audio codec",
+    )
+    ext: str = Field(
+        ...,
+        description="Extension for Ffmpeg supported container (must be compatible with other preset settings!)",
+    )
+    subfolder: str = Field(
+        ...,
+        description="Subfolder of the proxy output directory to write to. Keeps outputs apart from linkable proxies",
+    )
+
+
 class Proxy(BaseModel):
     ffmpeg_loglevel: str = Field(
         ..., description="Ffmpeg's internal loglevel visible in worker output"
@@ -106,6 +148,143 @@ class Proxy(BaseModel):
         ...,
         description="Whether or not to overwrite any existing proxy files on collision",
     )
+    trim_aware: bool = Field(
+        False,
+        description="Only encode the source ranges used on the timeline, filling the rest with black frames",
+    )
+    trim_handles: float = Field(
+        2.0,
+        ge=0,
+        description="Seconds of handles encoded either side of used ranges when trim-aware",
+    )
+    presets: list[Preset] = Field(
+        [],
+        description="Additional outputs encoded from the same decode. Only the proxy itself is linked",
+    )
+
+    @validator("presets")
+    def must_have_unique_nicknames(cls, v, values):
+        nicknames = [values.get("nickname"), *[x.nickname for x in v]]
+        if len(nicknames) != len(set(nicknames)):
+            raise ValueError(f"Preset nicknames must be unique: {nicknames}")
+        return v
+
+
+class Chunking(BaseModel):
+    enabled: bool = Field(
+        False,
+        description="Split long source media into chunks encoded in parallel by many workers",
+    )
+    duration_worth_chunking: int = Field(
+        300,
+        gt=0,
+        description="Minimum source duration in seconds before source media is split into chunks",
+    )
+    chunk_duration: int = Field(
+        60,
+        gt=0,
+        description="Target duration in seconds of each chunk",
+    )
+
+
+class TimeLimits(BaseModel):
+    enabled: bool = Field(
+        False,
+        description="Set each task's time limits from the duration of media it encodes. Only enforced by the prefork pool",
+    )
+    encode_speed: float = Field(
+        0.5,
+        gt=0,
+        description="Slowest expected encode speed as a multiple of realtime",
+    )
+    safety_multiplier: float = Field(
+        3.0,
+        ge=1,
+        description="Multiplier on the expected encode time before the soft time limit",
+    )
+    minimum: int = Field(
+        120,
+        gt=0,
+        description="Minimum soft time limit in seconds, covering startup and probing",
+    )
+    grace: int = Field(
+        60,
+        ge=0,
+        description="Seconds after the soft time limit before the task is killed",
+    )
+
+
+class Bundling(BaseModel):
+    enabled: bool = Field(
+        True,
+        description="Pack short clips into bundles, each encoded by a single task",
+    )
+    clip_duration: int = Field(
+        10,
+        gt=0,
+        description="Maximum source duration in seconds for a clip to be bundled",
+    )
+    bundle_duration: int = Field(
+        60,
+        gt=0,
+        description="Target total duration in seconds of the clips in each bundle",
+    )
+
+
+class Drafts(BaseModel):
+    enabled: bool = Field(
+        False,
+        description="Encode and link a fast, low resolution draft of every clip before its full quality proxy",
+    )
+    codec: str = Field("dnxhd", description="Ffmpeg supported codec for drafts")
+    vertical_res: str = Field(
+        "360",
+        description="Draft vertical resolution in pixels (aspect ratio is automatically preserved)",
+    )
+    profile: str = Field("dnxhr_lb", description="Ffmpeg profile for the draft codec")
+    pix_fmt: str = Field(
+        "yuv422p", description="Ffmpeg pixel format for the draft codec"
+    )
+    subfolder: str = Field(
+        "drafts",
+        description="Subfolder of the proxy output directory drafts are written to",
+    )
+
+
+class Priority(BaseModel):
+    enabled: bool = Field(
+        True,
+        description="Queue clips near the playhead and on the active track in more urgent lanes",
+    )
+    level_duration: float = Field(
+        30,
+        gt=0,
+        description="Seconds of timeline away from the playhead per lower priority lane",
+    )
+    behind_weight: float = Field(
+        2.0,
+        ge=1,
+        description="How many times further away clips behind the playhead count as",
+    )
+
+
+class ProbeCache(BaseModel):
+    enabled: bool = Field(
+        True,
+        description="Cache media probe results by file path, size and modification time",
+    )
+    shared: bool = Field(
+        True,
+        description="Share cached probe results between hosts through the Redis broker",
+    )
+    ttl: int = Field(
+        30, gt=0, description="Days a cached probe result is kept without being used"
+    )
+    max_entries: int = Field(
+        100000,
+        gt=0,
+        description="Probe results kept in each host's local cache. Least recently used are evicted",
+    )
 
 
 class Filters(BaseModel):
@@ -153,6 +332,71 @@ class Worker(BaseModel):
         min_items=0,
         description="Pre-command args. Use to invoke the command through another shell/terminal.",
     )
+    checkpoint_interval: int = Field(
+        0,
+        ge=0,
+        description="Seconds of encoded media between resumable checkpoints. 0 disables checkpointing",
+    )
+    reduced_resolution_decode: bool = Field(
+        True,
+        description="Decode at reduced resolution for codecs that support it, e.g. MJPEG, MPEG-2",
+    )
+    fast_decode: bool = Field(
+        False,
+        description="Skip the loop filter and use fast flags when decoding H.264/HEVC. Inexact, but frame accurate",
+    )
+    thread_budgeting: bool = Field(
+        True,
+        description="Share CPU cores between concurrent encodes on this host instead of each using all of them",
+    )
+    host_slots: int = Field(
+        0,
+        ge=0,
+        description="Concurrent encodes on this host. 0 uses the slot count from 'launch_workers', or 1",
+    )
+    slots: int = Field(
+        1,
+        ge=1,
+        description="Concurrent encodes supervised by each worker process. Above 1, tasks run in a thread pool",
+    )
+    warm: bool = Field(
+        False,
+        description="Reuse worker processes between tasks instead of restarting after each. Runs the prefork pool. Ignored if 'slots' is above 1",
+    )
+    warm_max_tasks: int = Field(
+        100,
+        gt=0,
+        description="Tasks a warm worker process runs before it's replaced",
+    )
+    warm_max_memory: int = Field(
+        1024,
+        gt=0,
+        description="Resident memory in MB a warm worker process can use before it's replaced",
+    )
+    staging_directory: str = Field(
+        "",
+        description="Local scratch directory to stage the sources of reserved tasks in. Empty disables staging",
+    )
+    staging_quota: float = Field(
+        50, gt=0, description="Disk space in GB staged sources can use"
+    )
+    output_staging: bool = Field(
+        False,
+        description="Encode to the staging directory and upload finished outputs in the background",
+    )
+    sequence_read_threads: int = Field(
+        8,
+        gt=0,
+        description="Threads reading image sequence frames ahead of the encoder",
+    )
+    stall_timeout: int = Field(
+        120,
+        ge=0,
+        description="Seconds without encode progress before FFmpeg is killed and the job requeued. 0 disables",
+    )
+    stall_retries: int = Field(
+        3, ge=0, description="Times a stalled job is requeued before it fails"
+    )
 
     @validator("loglevel")
     def must_be_valid_loglevel(cls, v):
@@ -165,9 +409,15 @@ class Worker(BaseModel):
 class Settings(BaseSettings):
     app: App
     broker: Broker
+    bundling: Bundling = Field(default_factory=Bundling)
+    chunking: Chunking = Field(default_factory=Chunking)
+    drafts: Drafts = Field(default_factory=Drafts)
     filters: Filters
     paths: Paths
+    priority: Priority = Field(default_factory=Priority)
+    probe_cache: ProbeCache = Field(default_factory=ProbeCache)
     proxy: Proxy
+    time_limits: TimeLimits = Field(default_factory=TimeLimits)
     worker: Worker
 
     class Config:
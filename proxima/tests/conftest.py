@@ -0,0 +1,84 @@
+import pytest
+
+from proxima.settings.manager import Proxy, settings
+from proxima.types.job import Job, ProjectMetadata, SourceMetadata, TimelineUsage
+
+FPS = 24.0
+FRAMES = 2400
+
+
+@pytest.fixture
+def make_job_dict(tmp_path):
+    """
+    Build a job dict as the queuer sends it, for a clip in `tmp_path`
+
+    Keyword arguments override source metadata. `job` and `proxy`
+    override job attributes and proxy settings.
+    """
+
+    def make(job: dict | None = None, proxy: dict | None = None, **source) -> dict:
+        source_file_path = tmp_path / "media" / "clip.mov"
+        source_file_path.parent.mkdir(exist_ok=True)
+        source_file_path.touch()
+
+        output_directory = tmp_path / "proxies"
+        return {
+            "project": {"project_name": "project", "timeline_name": "timeline"},
+            "source": {
+                "clip_name": "clip",
+                "file_name": "clip.mov",
+                "file_path": str(source_file_path),
+                "duration": "00:01:40:00",
+                "resolution": [1920, 1080],
+                "data_level": "Auto",
+                "frames": FRAMES,
+                "fps": FPS,
+                "h_flip": False,
+                "v_flip": False,
+                "start": 0,
+                "end": FRAMES - 1,
+                "start_tc": "00:00:00:00",
+                "proxy_status": "None",
+                "proxy_media_path": "",
+                "end_tc": "00:01:40:00",
+                "media_pool_id": "1",
+                **source,
+            },
+            "job": {
+                "output_file_path": str(output_directory / "clip.mov"),
+                "output_file_name": "clip",
+                "output_directory": str(output_directory),
+                "input_level": "in_range=limited",
+                "output_file_paths": {},
+                "remux": False,
+                "derived_from": None,
+                "chunks": [],
+                "probe_manifest": None,
+                **(job or {}),
+            },
+            "settings": {
+                **settings.dict(),
+                "proxy": {**settings.proxy.dict(), **(proxy or {})},
+            },
+        }
+
+    return make
+
+
+@pytest.fixture
+def make_job(make_job_dict):
+    """Build a queuer side Job from the `make_job_dict` arguments"""
+
+    def make(**kwargs) -> Job:
+        job_dict = make_job_dict(**kwargs)
+        source = job_dict["source"]
+        usages = [TimelineUsage(**x) for x in source.pop("usages", [])]
+        proxy = Proxy(**job_dict["settings"]["proxy"])
+
+        return Job(
+            ProjectMetadata(**job_dict["project"]),
+            SourceMetadata(**source, usages=usages),
+            settings.copy(update=dict(proxy=proxy)),
+        )
+
+    return make
@@ -0,0 +1,280 @@
+import pytest
+
+from proxima.celery.ffmpeg import builder
+from proxima.celery.tasks import get_task_job
+
+# Pinned, so expected commands don't depend on local settings
+PROXY = {
+    "codec": "dnxhd",
+    "vertical_res": "720",
+    "profile": "dnxhr_sq",
+    "pix_fmt": "yuv422p",
+    "audio_codec": "pcm_s16le",
+    "audio_samplerate": "48000",
+    "misc_args": ["-hide_banner"],
+    "presets": [],
+}
+
+REVIEW = {
+    "nickname": "Review",
+    "codec": "libx264",
+    "vertical_res": "540",
+    "profile": "high",
+    "pix_fmt": "yuv420p",
+    "audio_codec": "aac",
+    "audio_samplerate": "48000",
+    "ext": ".mp4",
+    "subfolder": "review",
+}
+
+
+@pytest.fixture
+def get_job(make_job_dict):
+    def get(presets: list[dict] | None = None, job: dict | None = None, **source):
+        proxy = {**PROXY, "presets": presets or []}
+        return get_task_job(make_job_dict(job=job, proxy=proxy, **source))
+
+    return get
+
+
+def test_output_resolution_keeps_aspect_with_even_width(get_job):
+    job = get_job(resolution=[1918, 1080])
+    assert builder.get_output_resolution(job, job.presets[0]) == (1278, 720)
+
+
+def test_output_resolution_never_upscales(get_job):
+    job = get_job(resolution=[1280, 540])
+    assert builder.get_output_resolution(job, job.presets[0]) == (1280, 540)
+
+
+def test_fill_generates_each_preset_at_output_size(get_job):
+    job = get_job(presets=[REVIEW])
+    outputs = [("chunk_0.mov", []), ("chunk_1.mp4", [])]
+
+    command = builder.get_ffmpeg_command(job, outputs, fill=2.5, filter_threads=2)
+
+    assert command[:6] == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-filter_complex_threads",
+        "2",
+        "-i",
+    ]
+    graph = command[command.index("-filter_complex") + 1]
+    assert graph == (
+        "color=c=black:s=1280x720:r=24.0:d=2.500000,format=yuv422p[v0];"
+        "color=c=black:s=960x540:r=24.0:d=2.500000,format=yuv420p[v1]"
+    )
+    # The source only provides audio
+    assert command.count("-i") == 1
+    assert command.count("0:a?") == 2
+    assert "scale" not in graph
+
+
+def test_join_filters_drops_disabled_filters():
+    assert builder.join_filters([None, "hflip", None, "format=yuv422p"]) == (
+        "hflip,format=yuv422p"
+    )
+    assert builder.join_filters([None, None]) == "null"
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({}, None),
+        ({"in_range": "in_range=limited"}, None),
+        ({"height": 720}, "scale=-2:720"),
+        (
+            {"in_range": "in_range=full"},
+            "scale=in_range=full:out_range=limited",
+        ),
+        (
+            {"height": 720, "in_range": "in_range=limited", "flags": "bilinear"},
+            "scale=-2:720:in_range=limited:out_range=limited:flags=bilinear",
+        ),
+    ],
+)
+def test_scale_filter(kwargs, expected):
+    assert builder.scale_filter(**kwargs) == expected
+
+
+def test_single_preset_command(get_job):
+    job = get_job(start_tc="01:00:00:00")
+    command = builder.get_ffmpeg_command(
+        job,
+        [(job.output_file_path, [])],
+        decoder_threads=2,
+        encoder_threads=4,
+        filter_threads=1,
+    )
+
+    assert command == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-filter_threads",
+        "1",
+        "-threads",
+        "2",
+        "-i",
+        job.input_file_path,
+        "-vf",
+        "scale=-2:720:in_range=limited:out_range=limited,format=yuv422p",
+        "-c:v",
+        "dnxhd",
+        "-profile:v",
+        "dnxhr_sq",
+        "-threads",
+        "4",
+        "-vsync",
+        "-1",
+        "-c:a",
+        "pcm_s16le",
+        "-ar",
+        "48000",
+        "-timecode",
+        "01:00:00:00",
+        "-movflags",
+        "+write_colr",
+        job.output_file_path,
+    ]
+
+
+def test_limited_range_at_proxy_size_skips_scaler(get_job):
+    job = get_job(resolution=[1280, 720])
+    assert builder.get_filter_graph(job, job.presets) == "format=yuv422p"
+
+
+def test_full_range_converts_without_resizing(get_job):
+    job = get_job(resolution=[1280, 720], job={"input_level": "in_range=full"})
+    assert builder.get_filter_graph(job, job.presets) == (
+        "scale=in_range=full:out_range=limited,format=yuv422p"
+    )
+
+
+def test_single_preset_flips_after_scaling(get_job):
+    job = get_job(h_flip=True, v_flip=True)
+    assert builder.get_filter_graph(job, job.presets) == (
+        "scale=-2:720:in_range=limited:out_range=limited,hflip,vflip,format=yuv422p"
+    )
+
+
+def test_multiple_presets_flip_once_and_split(get_job):
+    job = get_job(presets=[REVIEW], h_flip=True)
+    assert builder.get_filter_graph(job, job.presets) == (
+        "[0:v]hflip,split=2[s0][s1];"
+        "[s0]scale=-2:720:in_range=limited:out_range=limited,format=yuv422p[v0];"
+        "[s1]scale=-2:540:in_range=limited:out_range=limited,format=yuv420p[v1]"
+    )
+
+
+def test_multiple_presets_command(get_job):
+    job = get_job(presets=[REVIEW])
+    outputs = [("proxy.mov", []), ("review.mp4", ["-crf", "23"])]
+    command = builder.get_ffmpeg_command(job, outputs, muxer_args=[], filter_threads=2)
+
+    assert command == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-filter_complex_threads",
+        "2",
+        "-i",
+        job.input_file_path,
+        "-filter_complex",
+        builder.get_filter_graph(job, job.presets),
+        "-map",
+        "[v0]",
+        "-map",
+        "0:a?",
+        "-c:v",
+        "dnxhd",
+        "-profile:v",
+        "dnxhr_sq",
+        "-vsync",
+        "-1",
+        "-c:a",
+        "pcm_s16le",
+        "-ar",
+        "48000",
+        "proxy.mov",
+        "-map",
+        "[v1]",
+        "-map",
+        "0:a?",
+        "-c:v",
+        "libx264",
+        "-profile:v",
+        "high",
+        "-vsync",
+        "-1",
+        "-c:a",
+        "aac",
+        "-ar",
+        "48000",
+        "-crf",
+        "23",
+        "review.mp4",
+    ]
+
+
+def test_derived_job_reads_proxy_without_flipping(get_job, tmp_path):
+    derived_from = tmp_path / "proxies" / "clip_1080.mov"
+    derived_from.parent.mkdir()
+    derived_from.touch()
+
+    job = get_job(
+        resolution=[1280, 720],
+        h_flip=True,
+        job={"derived_from": str(derived_from)},
+    )
+
+    # Derived proxies are already flipped, and always resized
+    assert builder.get_filter_graph(job, job.presets) == (
+        "scale=-2:720:in_range=limited:out_range=limited,format=yuv422p"
+    )
+    command = builder.get_ffmpeg_command(job, [(job.output_file_path, [])])
+    assert command[command.index("-i") + 1] == str(derived_from)
+
+
+def test_thread_args_match_graph_type():
+    assert builder.get_thread_args(2, 4, 1) == (
+        ["-filter_threads", "1"],
+        ["-threads", "2"],
+        ["-threads", "4"],
+    )
+    assert builder.get_thread_args(filter_threads=1, complex_graph=True) == (
+        ["-filter_complex_threads", "1"],
+        [],
+        [],
+    )
+    assert builder.get_thread_args() == ([], [], [])
+
+
+def test_remux_command(get_job):
+    job = get_job(start_tc="01:00:00:00")
+
+    assert builder.get_remux_command(job, "remux.mov") == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-i",
+        job.input_file_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a?",
+        "-c:v",
+        "copy",
+        "-c:a",
+        "pcm_s16le",
+        "-ar",
+        "48000",
+        "-timecode",
+        "01:00:00:00",
+        "-movflags",
+        "+write_colr",
+        "remux.mov",
+    ]
+    assert builder.get_remux_command(job)[-1] == job.output_file_path
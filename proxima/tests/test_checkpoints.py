@@ -0,0 +1,106 @@
+import os
+import pathlib
+
+import pytest
+
+from proxima.celery.tasks import get_checkpoints, get_task_job
+from proxima.settings.manager import settings
+
+INTERVAL = 10  # seconds per segment
+
+# A second output preset, so outputs have to be kept in step
+HALF = {**settings.proxy.dict(), "nickname": "Half", "subfolder": "half"}
+
+
+@pytest.fixture
+def job(make_job_dict):
+    job = get_task_job(make_job_dict(proxy={"presets": [HALF]}))
+    os.makedirs(job.checkpoint_directory)
+    return job
+
+
+@pytest.fixture
+def directory(job):
+    return pathlib.Path(job.checkpoint_directory)
+
+
+def write_attempt(directory, start_frame: int, segments: dict[int, list[int]]):
+    """
+    Write an encode attempt's segments and segment lists
+
+    Args:
+        start_frame (int): Frame the attempt started from
+        segments (dict[int, list[int]]): Segment numbers by preset index
+    """
+
+    for preset_index, numbers in segments.items():
+        list_path = directory / f"segments_{start_frame:08d}_{preset_index}.csv"
+        with open(list_path, "w") as f:
+            for i, number in enumerate(numbers):
+                file_name = f"segment_{preset_index}_{number:05d}.mov"
+                (directory / file_name).write_bytes(b"segment")
+                f.write(f"{file_name},{i * INTERVAL}.0,{(i + 1) * INTERVAL}.0\n")
+
+
+def segment(directory, preset_index: int, number: int) -> str:
+    return os.path.join(directory, f"segment_{preset_index}_{number:05d}.mov")
+
+
+def test_no_checkpoints(job):
+    assert get_checkpoints(job) == ([[], []], 0)
+
+
+def test_resume_after_interrupted_attempt(job, directory):
+    write_attempt(directory, 0, {0: [0, 1, 2], 1: [0, 1]})
+    (directory / "segment_1_00002.mov").write_bytes(b"partial")
+
+    completed, resume_frame = get_checkpoints(job)
+
+    assert completed == [
+        [segment(directory, 0, 0), segment(directory, 0, 1)],
+        [segment(directory, 1, 0), segment(directory, 1, 1)],
+    ]
+    assert resume_frame == 2 * INTERVAL * job.source.fps
+
+    # Segments beyond those completed by every output are removed
+    assert not os.path.exists(segment(directory, 0, 2))
+    assert not os.path.exists(segment(directory, 1, 2))
+
+
+def test_resume_after_several_attempts(job, directory):
+    write_attempt(directory, 0, {0: [0, 1], 1: [0, 1]})
+    write_attempt(directory, 480, {0: [2], 1: [2]})
+
+    completed, resume_frame = get_checkpoints(job)
+
+    assert completed[0] == [segment(directory, 0, x) for x in range(3)]
+    assert completed[1] == [segment(directory, 1, x) for x in range(3)]
+    assert resume_frame == 720
+
+
+def test_out_of_sequence_attempt_is_ignored(job, directory):
+    write_attempt(directory, 0, {0: [0], 1: [0]})
+    write_attempt(directory, 999, {0: [1], 1: [1]})
+
+    completed, resume_frame = get_checkpoints(job)
+
+    assert completed == [[segment(directory, 0, 0)], [segment(directory, 1, 0)]]
+    assert resume_frame == 240
+    assert not os.path.exists(segment(directory, 0, 1))
+
+
+def test_missing_segment_ends_attempt(job, directory):
+    write_attempt(directory, 0, {0: [0, 1, 2], 1: [0, 1, 2]})
+    os.remove(segment(directory, 0, 1))
+
+    completed, resume_frame = get_checkpoints(job)
+
+    assert completed == [[segment(directory, 0, 0)], [segment(directory, 1, 0)]]
+    assert resume_frame == 240
+
+
+def test_attempt_without_every_list_is_skipped(job, directory):
+    write_attempt(directory, 0, {0: [0, 1]})
+
+    assert get_checkpoints(job) == ([[], []], 0)
+    assert not os.path.exists(segment(directory, 0, 0))
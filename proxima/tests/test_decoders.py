@@ -0,0 +1,36 @@
+import pytest
+
+from proxima.celery.ffmpeg.decoders import get_decoder_args, get_lowres_factor
+
+
+@pytest.mark.parametrize(
+    "height, target_height, factor",
+    [
+        (2160, 1080, 1),  # Exactly half
+        (2160, 1081, 0),  # Just over half, full resolution needed
+        (2160, 540, 2),
+        (2160, 270, 3),
+        (2160, 100, 3),  # Capped at the decoder's max factor
+        (1080, 1080, 0),
+        (720, 1080, 0),  # Source smaller than target
+    ],
+)
+def test_lowres_factor_limits(height, target_height, factor):
+    assert get_lowres_factor("mjpeg", height, target_height) == factor
+
+
+def test_unsupported_codec_decodes_full_resolution():
+    assert get_lowres_factor("h264", 2160, 270) == 0
+    assert get_lowres_factor("", 2160, 270) == 0
+
+
+def test_decoder_args():
+    assert get_decoder_args("mjpeg", 2160, 540) == ["-lowres", "2"]
+    assert get_decoder_args("mjpeg", 2160, 540, lowres=False) == []
+    assert get_decoder_args("h264", 2160, 540) == []
+    assert get_decoder_args("h264", 2160, 540, fast=True) == [
+        "-skip_loop_filter",
+        "all",
+        "-flags2",
+        "+fast",
+    ]
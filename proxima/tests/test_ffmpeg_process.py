@@ -0,0 +1,74 @@
+import logging
+import shutil
+
+import pytest
+
+from proxima.celery.ffmpeg.ffmpeg_process import FfmpegProcess
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="FFmpeg is not installed"
+)
+
+
+class FakeTask:
+    """Stands in for the bound Celery task FFmpeg reports progress to"""
+
+    def __init__(self):
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, meta))
+
+
+def get_command(output_path, source="testsrc=duration=1:size=64x36:rate=24"):
+    return [
+        "ffmpeg",
+        "-f",
+        "lavfi",
+        "-i",
+        source,
+        "-c:v",
+        "mjpeg",
+        str(output_path),
+    ]
+
+
+def test_run_encodes_lavfi_source(tmp_path):
+    output_path = tmp_path / "proxy.mov"
+    task = FakeTask()
+
+    process = FfmpegProcess("task", "channel", get_command(output_path), duration=1)
+    returncode = process.run(task, logfile=tmp_path / "ffmpeg.log")
+
+    assert returncode == 0
+    assert output_path.stat().st_size > 0
+    assert task.states and task.states[-1][0] == "ENCODING"
+
+
+def test_run_returns_nonzero_on_failure(tmp_path, caplog):
+    output_path = tmp_path / "proxy.mov"
+
+    command = get_command(output_path, source="nosuchfilter")
+    process = FfmpegProcess("task", "channel", command, duration=1)
+
+    with caplog.at_level(logging.INFO, logger="proxima"):
+        assert process.run(FakeTask(), logfile=tmp_path / "ffmpeg.log") != 0
+
+    assert "FFmpeg exited with code" in caplog.text
+    assert "Finished encoding" not in caplog.text
+
+
+def test_run_feeds_stdin(tmp_path):
+    output_path = tmp_path / "proxy.mov"
+    fed = []
+
+    def feed(stream):
+        fed.append(True)
+        stream.close()
+
+    command = ["ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=1:size=64x36"]
+    command += ["-c:v", "mjpeg", str(output_path)]
+    process = FfmpegProcess("task", "channel", command, duration=1, feed=feed)
+
+    assert process.run(FakeTask(), logfile=tmp_path / "ffmpeg.log") == 0
+    assert fed
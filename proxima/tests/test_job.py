@@ -0,0 +1,151 @@
+import pytest
+
+from proxima.celery.ffmpeg import ProbeResult
+from proxima.celery.ffmpeg.builder import TRIMMED_COMMENT
+from proxima.types import job as job_module
+
+FRAMES = 2400
+
+
+@pytest.fixture
+def trim(make_job):
+    """Trim ranges of a source used at the given source frame ranges"""
+
+    def get_trim_ranges(
+        used: list[tuple[int, int]], trim_aware: bool = True, trim_handles: float = 1.0
+    ) -> list[tuple[int, int, bool]]:
+        usages = [
+            {
+                "track": 1,
+                "record_start": i * 1000,
+                "record_end": i * 1000 + end - start,
+                "source_start": start,
+                "source_end": end,
+            }
+            for i, (start, end) in enumerate(used)
+        ]
+        proxy = dict(trim_aware=trim_aware, trim_handles=trim_handles)
+        return make_job(usages=usages, proxy=proxy).trim_ranges
+
+    return get_trim_ranges
+
+
+def test_single_use_fills_both_sides(trim):
+    assert trim([(1000, 1100)]) == [
+        (0, 976, True),
+        (976, 1124, False),
+        (1124, FRAMES, True),
+    ]
+
+
+def test_short_gaps_are_merged(trim):
+    # Handled ranges are 12 frames apart, less than the minimum gap
+    assert trim([(1000, 1100), (1160, 1300)]) == [
+        (0, 976, True),
+        (976, 1324, False),
+        (1324, FRAMES, True),
+    ]
+
+
+def test_overlapping_uses_are_merged(trim):
+    assert trim([(1000, 1100), (1050, 1200)]) == [
+        (0, 976, True),
+        (976, 1224, False),
+        (1224, FRAMES, True),
+    ]
+
+
+def test_long_gaps_are_filled(trim):
+    assert trim([(100, 200), (1000, 1100)]) == [
+        (0, 76, True),
+        (76, 224, False),
+        (224, 976, True),
+        (976, 1124, False),
+        (1124, FRAMES, True),
+    ]
+
+
+def test_short_leading_gap_is_encoded(trim):
+    assert trim([(30, 1000)]) == [
+        (0, 1024, False),
+        (1024, FRAMES, True),
+    ]
+
+
+def test_short_trailing_gap_is_encoded(trim):
+    assert trim([(1000, FRAMES - 30)]) == [
+        (0, 976, True),
+        (976, FRAMES, False),
+    ]
+
+
+@pytest.mark.parametrize(
+    "used",
+    [
+        [(30, FRAMES - 30)],  # Short gaps on both sides
+        [(0, FRAMES)],
+        [(0, 1200), (1210, FRAMES)],
+    ],
+)
+def test_fully_used_source_is_not_trimmed(trim, used):
+    assert trim(used) == []
+
+
+def test_handles_are_clamped_to_source(trim):
+    assert trim([(0, 100)], trim_handles=10) == [
+        (0, 340, False),
+        (340, FRAMES, True),
+    ]
+
+
+def test_unused_source_is_not_trimmed(trim):
+    assert trim([]) == []
+
+
+def test_disabled_is_not_trimmed(trim):
+    assert trim([(1000, 1100)], trim_aware=False) == []
+
+
+@pytest.fixture
+def derive(make_job, monkeypatch):
+    """Proxy a job derives from, given existing proxies by path"""
+
+    def get_derived_from(proxies: dict[str, ProbeResult]) -> str | None:
+        monkeypatch.setattr(job_module.ffmpeg, "probe", proxies.__getitem__)
+        job = make_job(proxy={"vertical_res": "720"})
+        job.__dict__.update(can_remux=False, linkable_proxies=list(proxies))
+        return job.derived_from
+
+    return get_derived_from
+
+
+def get_proxy_probe(height: int, comment: str | None = None) -> ProbeResult:
+    return ProbeResult(
+        duration=FRAMES / 24.0,
+        stream_index=0,
+        codec="dnxhd",
+        profile="DNXHR HQ",
+        width=height * 16 // 9,
+        height=height,
+        pix_fmt="yuv422p",
+        color_range="tv",
+        frames=FRAMES,
+        stream_duration=FRAMES / 24.0,
+        comment=comment,
+    )
+
+
+def test_derives_from_lowest_suitable_proxy(derive):
+    proxies = {
+        "clip_2160.mov": get_proxy_probe(2160),
+        "clip_1080.mov": get_proxy_probe(1080),
+    }
+    assert derive(proxies) == "clip_1080.mov"
+
+
+def test_never_derives_from_trimmed_proxies(derive):
+    proxies = {
+        "clip_2160.mov": get_proxy_probe(2160),
+        "clip_1080.mov": get_proxy_probe(1080, comment=TRIMMED_COMMENT),
+    }
+    assert derive(proxies) == "clip_2160.mov"
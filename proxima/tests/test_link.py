@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from proxima.app import link
+
+
+class FakeMediaPoolItem:
+    def __init__(self):
+        self.linked = None
+
+    def link_proxy(self, proxy_media_path: str) -> bool:
+        self.linked = proxy_media_path
+        return True
+
+
+def test_batch_link_skips_failed_encodes(make_job, tmp_path, monkeypatch):
+    jobs = [make_job(media_pool_id=str(i)) for i in range(3)]
+    items = {str(i): FakeMediaPoolItem() for i in range(3)}
+
+    for i, job in enumerate(jobs):
+        job.output_file_path = str(tmp_path / f"proxy_{i}.mov")
+        if i != 1:  # The second encode failed
+            (tmp_path / f"proxy_{i}.mov").touch()
+
+    monkeypatch.setattr(
+        link, "resolve", SimpleNamespace(project=SimpleNamespace(name="project"))
+    )
+    monkeypatch.setattr(link.media_pool_index, "lookup", items.get)
+
+    linker = link.ProxyLinker(jobs)
+    linker.batch_link()
+
+    assert linker.link_success == [jobs[0], jobs[2]]
+    assert linker.missing_fail == [jobs[1]]
+    assert items["0"].linked and items["2"].linked
+    assert items["1"].linked is None
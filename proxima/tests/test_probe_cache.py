@@ -0,0 +1,40 @@
+import os
+import threading
+
+import pytest
+
+from proxima.celery.ffmpeg import probe_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh local cache tier, with the shared tier disabled"""
+
+    monkeypatch.setattr(probe_cache, "probe_cache_file", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(probe_cache, "_local", threading.local())
+    monkeypatch.setattr(probe_cache, "_schema_created", False)
+    monkeypatch.setattr(probe_cache, "get_redis", lambda: None)
+    monkeypatch.setattr(probe_cache.settings.probe_cache, "enabled", True)
+    return probe_cache
+
+
+def test_put_then_get(cache, tmp_path):
+    media = tmp_path / "clip.mov"
+    media.write_bytes(b"media")
+    stat = os.stat(media)
+
+    assert cache.get(str(media), stat) is None
+    cache.put(str(media), stat, {"codec": "prores"})
+    assert cache.get(str(media), stat) == {"codec": "prores"}
+
+
+def test_connections_are_reused_per_thread(cache):
+    connection = cache.get_connection()
+    assert cache.get_connection() is connection
+    assert cache._schema_created
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(cache.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not connection
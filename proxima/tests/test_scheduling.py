@@ -0,0 +1,226 @@
+import pytest
+
+from proxima.app.scheduling import (
+    BACKGROUND_PRIORITY,
+    DEFAULT_PRIORITY,
+    DRAFT_PRIORITIES,
+    FILL_COST,
+    FULL_PRIORITIES,
+    REMUX_COST,
+    QueueOrder,
+    get_job_cost,
+    get_priority,
+    get_task_cost,
+    order_jobs,
+    set_priorities,
+)
+from proxima.settings.manager import Priority
+from proxima.types.job import Playhead
+
+FPS = 24.0
+
+
+@pytest.fixture
+def get_job(make_job_dict):
+    """A queued job, by what scheduling reads"""
+
+    def make(
+        name: str = "clip.mov",
+        frames: int = 100,
+        resolution: tuple[int, int] = (1920, 1080),
+        codec: str = "h264",
+        proxy_codec: str = "dnxhd",
+        vertical_res: str = "1080",
+        presets: list[dict] | None = None,
+        chunks: list[dict] | None = None,
+        remux: bool = False,
+        derived_from: str | None = None,
+        usages: list[dict] | None = None,
+    ) -> dict:
+        return make_job_dict(
+            file_name=name,
+            frames=frames,
+            resolution=list(resolution),
+            usages=usages or [],
+            job={
+                "chunks": chunks or [],
+                "remux": remux,
+                "derived_from": derived_from,
+                "probe_manifest": {"result": {"codec": codec}},
+            },
+            proxy={
+                "codec": proxy_codec,
+                "vertical_res": vertical_res,
+                "presets": presets or [],
+            },
+        )
+
+    return make
+
+
+def test_cost_scales_with_frames(get_job):
+    assert get_job_cost(get_job(frames=200)) == pytest.approx(
+        2 * get_job_cost(get_job(frames=100))
+    )
+
+
+def test_cost_by_codec(get_job):
+    # Source pixels are 2.0736 megapixels
+    assert get_job_cost(get_job(codec="h264")) == pytest.approx(100 * 2.0736 * 1.3)
+    assert get_job_cost(get_job(codec="hevc")) > get_job_cost(get_job(codec="h264"))
+    assert get_job_cost(get_job(codec="unknown")) == get_job_cost(get_job())
+
+
+def test_cost_of_downscaled_presets(get_job):
+    full = get_job_cost(get_job(vertical_res="1080"))
+    half = get_job_cost(get_job(vertical_res="540"))
+    assert half == pytest.approx(100 * 2.0736 * (1 + 0.3 / 4))
+    assert half < full
+
+    # Proxies are never upscaled
+    assert get_job_cost(get_job(vertical_res="2160")) == pytest.approx(full)
+
+
+def test_cost_of_extra_presets(get_job):
+    preset = {"codec": "libx264", "vertical_res": "1080"}
+    assert get_job_cost(get_job(presets=[preset])) == pytest.approx(
+        get_job_cost(get_job()) + 100 * 2.0736
+    )
+
+
+def test_cost_of_remux_and_derived_jobs(get_job):
+    assert get_job_cost(get_job(remux=True)) == pytest.approx(100 * 2.0736 * REMUX_COST)
+    assert get_job_cost(get_job(derived_from="proxy.mov")) == get_job_cost(
+        get_job(codec="dnxhd")
+    )
+
+
+def test_cost_of_chunked_jobs(get_job):
+    chunks = [
+        {"start_frame": 0, "end_frame": 50, "fill": False},
+        {"start_frame": 50, "end_frame": 150, "fill": True},
+    ]
+    job = get_job(frames=150, chunks=chunks)
+
+    # Filled chunks are nearly free
+    assert get_job_cost(job) == pytest.approx(
+        get_job_cost(get_job(frames=50 + 100 * FILL_COST))
+    )
+
+    # Chunks are encoded in parallel
+    assert get_task_cost(job) == pytest.approx(get_job_cost(job) / 2)
+
+
+def test_order_jobs(get_job):
+    jobs = [get_job("short", frames=10), get_job("long", frames=1000)]
+    jobs.append(get_job("middle", frames=100))
+
+    def names(order: QueueOrder) -> list[str]:
+        return [x["source"]["file_name"] for x in order_jobs(jobs, order)]
+
+    assert names(QueueOrder.lpt) == ["long", "middle", "short"]
+    assert names(QueueOrder.spt) == ["short", "middle", "long"]
+
+
+@pytest.fixture
+def get_used_job(get_job):
+    """A job used on the timeline at (track, record start, end)"""
+
+    def make(*usages: tuple[int, int, int]) -> dict:
+        return get_job(
+            usages=[
+                {"track": track, "record_start": start, "record_end": end}
+                for track, start, end in usages
+            ]
+        )
+
+    return make
+
+
+# 30 seconds of timeline per lane, clips behind count twice as far
+PRIORITY = Priority(level_duration=30, behind_weight=2.0)
+PLAYHEAD = Playhead(frame=10_000, fps=FPS, track=2)
+
+
+def seconds(value: float) -> int:
+    return round(value * FPS)
+
+
+@pytest.mark.parametrize(
+    "start, end, lane",
+    [
+        (9_000, 11_000, 0),  # Under the playhead
+        (10_000 + seconds(29), 20_000, 0),
+        (10_000 + seconds(30), 20_000, 1),
+        (10_000 + seconds(95), 20_000, 3),
+        (10_000 + seconds(1_000), 50_000, 8),  # Least urgent interactive lane
+    ],
+)
+def test_priority_ahead_of_playhead(get_used_job, start, end, lane):
+    assert get_priority(get_used_job((1, start, end)), PLAYHEAD, PRIORITY) == lane
+
+
+@pytest.mark.parametrize(
+    "seconds_behind, lane",
+    [
+        (14, 0),
+        (15, 1),  # Counts as 30 seconds away
+        (45, 3),
+    ],
+)
+def test_priority_behind_playhead_is_weighted(get_used_job, seconds_behind, lane):
+    job = get_used_job((1, 0, 10_000 - seconds(seconds_behind)))
+    assert get_priority(job, PLAYHEAD, PRIORITY) == lane
+
+
+def test_priority_active_track_is_raised_a_lane(get_used_job):
+    start = 10_000 + seconds(95)
+    assert get_priority(get_used_job((1, start, 20_000)), PLAYHEAD, PRIORITY) == 3
+    assert get_priority(get_used_job((2, start, 20_000)), PLAYHEAD, PRIORITY) == 2
+
+    # Never above the most urgent lane
+    assert get_priority(get_used_job((2, 9_000, 11_000)), PLAYHEAD, PRIORITY) == 0
+
+
+def test_priority_of_nearest_use(get_used_job):
+    job = get_used_job((1, 10_000 + seconds(200), 20_000), (1, 10_100, 10_200))
+    assert get_priority(job, PLAYHEAD, PRIORITY) == 0
+
+
+def test_priority_of_unused_source(get_used_job):
+    assert get_priority(get_used_job(), PLAYHEAD, PRIORITY) == 8
+
+
+def test_priority_lanes(get_used_job):
+    near = get_used_job((1, 9_000, 11_000))
+    far = get_used_job((1, 10_000 + seconds(1_000), 50_000))
+
+    assert get_priority(near, PLAYHEAD, PRIORITY, DRAFT_PRIORITIES) == 0
+    assert get_priority(far, PLAYHEAD, PRIORITY, DRAFT_PRIORITIES) == 3
+    assert get_priority(near, PLAYHEAD, PRIORITY, FULL_PRIORITIES) == 4
+    assert get_priority(far, PLAYHEAD, PRIORITY, FULL_PRIORITIES) == 8
+
+
+def test_set_priorities(get_used_job):
+    jobs = [get_used_job((1, 9_000, 11_000)), get_used_job()]
+
+    set_priorities(jobs, PLAYHEAD, PRIORITY)
+    assert [x["priority"] for x in jobs] == [0, 8]
+
+    set_priorities(jobs, PLAYHEAD, PRIORITY, background=True)
+    assert [x["priority"] for x in jobs] == [BACKGROUND_PRIORITY] * 2
+
+    set_priorities(jobs, None, PRIORITY)
+    assert [x["priority"] for x in jobs] == [DEFAULT_PRIORITY] * 2
+
+    set_priorities(jobs, PLAYHEAD, Priority(enabled=False))
+    assert [x["priority"] for x in jobs] == [DEFAULT_PRIORITY] * 2
+
+
+def test_drafts_stay_ahead_without_playhead(get_used_job):
+    drafts, full = [get_used_job()], [get_used_job()]
+
+    set_priorities(drafts, None, PRIORITY, lanes=DRAFT_PRIORITIES)
+    set_priorities(full, None, PRIORITY, lanes=FULL_PRIORITIES)
+
+    assert drafts[0]["priority"] < full[0]["priority"]
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from proxima.celery import staging
+
+
+class FakeBackend:
+    def __init__(self):
+        self.reports = {}
+
+    def mark_as_done(self, task_id, result):
+        self.reports[task_id] = result
+
+    def mark_as_failure(self, task_id, exc):
+        self.reports[task_id] = exc
+
+
+def get_task(task_id: str = "task"):
+    return SimpleNamespace(request=SimpleNamespace(id=task_id), backend=FakeBackend())
+
+
+def test_report_uploads_waits_for_pending_uploads():
+    task = get_task()
+    uploads = [Future(), Future()]
+    cleaned = []
+
+    staging.report_uploads(task, uploads, on_success=lambda: cleaned.append(True))
+    uploads[0].set_result(None)
+    assert not task.backend.reports
+
+    uploads[1].set_result(None)
+    assert task.backend.reports == {"task-uploads": None}
+    assert cleaned == [True]
+
+
+def test_report_uploads_reports_failed_uploads():
+    task = get_task()
+    uploads = [Future(), Future()]
+    cleaned = []
+
+    staging.report_uploads(
+        task,
+        uploads,
+        on_success=lambda: cleaned.append(True),
+        get_error=lambda failed: ValueError(failed),
+    )
+    uploads[0].set_result(None)
+    uploads[1].set_exception(IOError("Upload is incomplete"))
+
+    assert task.backend.reports["task-uploads"].args == ([1],)
+    assert not cleaned
+
+
+def test_report_uploads_without_uploads_reports_immediately():
+    task = get_task()
+    staging.report_uploads(task, [])
+    assert task.backend.reports == {"task-uploads": None}
+
+
+def test_request_sources_skip_sequences_and_derived_jobs(make_job_dict):
+    clip = make_job_dict()
+    sequence = make_job_dict(file_path="/media/plate.[1001-1100].exr")
+    derived = make_job_dict(job={"derived_from": "/proxies/clip_1080.mov"})
+
+    request = SimpleNamespace(args=[[clip, sequence, derived]])
+    assert staging.get_request_sources(request) == [clip["source"]["file_path"]]
+
+    request = SimpleNamespace(args=[sequence])
+    assert staging.get_request_sources(request) == []
+
+
+def test_uploads_are_tracked_until_done(tmp_path, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(staging, "get_output_staging_directory", lambda: str(tmp_path))
+    monkeypatch.setattr(staging, "upload", lambda *_: release.wait(5))
+
+    output_file_path = str(tmp_path / "proxies" / "clip.mov")
+    future = staging.publish(str(tmp_path / "clip.mov"), output_file_path)
+    assert staging.get_upload(output_file_path) is future
+
+    # Done callbacks can run just after the result is set
+    done = threading.Event()
+    future.add_done_callback(lambda _: done.set())
+    release.set()
+    assert done.wait(5)
+    assert staging.get_upload(output_file_path) is None
@@ -12,6 +12,7 @@ from rich.prompt import Confirm, Prompt
 from proxima.app import core, exceptions
 from proxima.settings.manager import settings
 from proxima.types.job import Job
+from proxima.types.media_pool_index import media_pool_index
 
 core.install_rich_tracebacks()
 logger = logging.getLogger("proxima")
@@ -28,6 +29,9 @@ class Batch:
         self.existing_link_requeued_count = 0
         self.batch = batch
 
+        # Draft proxy paths linked before full quality, by media pool ID
+        self.linked_drafts: dict[str, str] = {}
+
         # instantiate cached properties
         self.project
         self.timeline
@@ -71,7 +75,7 @@ class Batch:
         - project, timeline name
         - Linked, requeued and failed to link existing proxies
         - Proxy preset nickname, write mode: overwrite, unique
-        - Total proxies queueable now
+        - Total queueable proxies, how many can be remuxed or derived
 
         Returns:
             str: A multiline string with batch information
@@ -86,11 +90,17 @@ class Batch:
         else:
             overwrite_warning = "[magenta]OVERWRITE"
 
+        nicknames = " + ".join(
+            [settings.proxy.nickname, *[x.nickname for x in settings.proxy.presets]]
+        )
+
         return str(
             f"[cyan]{self.project} | {self.timeline}[/]\n"
             f"[green]Linked {els} | [yellow]Requeued {elr} | [red]Failed {elf}\n"
-            f"{settings.proxy.nickname} | {overwrite_warning}\n"
-            f"\n[bold][white]Total queueable now:[/bold] {len(self.batch)}\n"
+            f"{nicknames} | {overwrite_warning}\n"
+            f"\n[bold][white]Total queueable now:[/bold] {len(self.batch)}"
+            f" | [cyan]Remux {len([x for x in self.batch if x.can_remux])}"
+            f" | Derived {len([x for x in self.batch if x.derived_from])}\n"
         )
 
     @property
@@ -140,10 +150,18 @@ class Batch:
                 "output_file_path": x.output_file_path,
                 "output_file_name": x.output_file_name,
                 "output_directory": x.output_directory,
+                "output_file_paths": x.output_file_paths,
                 "is_linked": x.is_linked,
                 "is_offline": x.is_offline,
                 "newest_linkable_proxy": x.newest_linkable_proxy,
                 "input_level": x.input_level,
+                "derived_from": x.derived_from,
+                "draft": x.draft,
+                "remux": x.can_remux,
+                "chunks": [asdict(c) for c in x.chunks],
+                "probe_manifest": (
+                    x.probe_manifest.as_dict() if x.probe_manifest else None
+                ),
             }
 
             data.append(
@@ -157,6 +175,53 @@ class Batch:
 
         return data
 
+    def get_drafts(self) -> "Batch":
+        """
+        A batch of drafts for every job, ordered by timeline position
+
+        Drafts of clips used earliest on the timeline are queued first,
+        so the start of the timeline becomes usable soonest.
+        """
+
+        return Batch(
+            sorted(
+                [x.as_draft() for x in self.batch],
+                key=lambda x: x.timeline_position,
+            )
+        )
+
+    def track_linked_drafts(self, drafts: list[Job]):
+        """Remember linked drafts, so full quality only replaces them"""
+
+        self.linked_drafts.update(
+            {x.source.media_pool_id: x.output_file_path for x in drafts}
+        )
+
+    def get_relinkable(self) -> list[Job]:
+        """
+        Jobs whose full quality proxy can be linked
+
+        Clips with a linked draft are only relinked while the draft is
+        still linked, not if it's been unlinked or replaced since.
+        Clips whose draft never linked are linked as usual.
+        """
+
+        relinkable = []
+        for job in self.batch:
+            draft = self.linked_drafts.get(job.source.media_pool_id)
+            if draft:
+                mpi = media_pool_index.lookup(job.source.media_pool_id)
+                current = mpi.properties["Proxy Media Path"]
+                if os.path.normpath(current or "") != os.path.normpath(draft):
+                    logger.warning(
+                        f"[yellow]Not relinking '{job.source.file_name}', its draft is no longer linked"
+                    )
+                    continue
+
+            relinkable.append(job)
+
+        return relinkable
+
     def remove_healthy(self):
         """Remove linked and online source media, i.e. \"healthy\" """
         self.batch = [x for x in self.batch if not x.is_linked or x.is_offline]
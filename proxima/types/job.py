@@ -2,12 +2,14 @@ import logging
 import os
 import pathlib
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import cached_property
+from glob import escape as glob_escape
 from glob import glob
 
 from proxima.app import core, exceptions
 from proxima.celery import ffmpeg
+from proxima.celery.ffmpeg.builder import TRIMMED_COMMENT
 from proxima.settings.manager import Settings, settings
 from proxima.types.media_pool_index import media_pool_index
 
@@ -16,6 +18,93 @@ logger = logging.getLogger("proxima")
 logger.setLevel(settings.app.loglevel)
 
 
+# FFmpeg encoder names mapped to the codec name probes report
+ENCODER_CODECS = {
+    "prores_ks": "prores",
+    "prores_aw": "prores",
+    "prores_videotoolbox": "prores",
+    "libx264": "h264",
+    "h264_nvenc": "h264",
+    "h264_videotoolbox": "h264",
+    "libx265": "hevc",
+    "hevc_nvenc": "hevc",
+    "hevc_videotoolbox": "hevc",
+}
+
+
+# Codecs where every frame is a keyframe, cheap to decode and seek
+INTRAFRAME_CODECS = ["dnxhd", "prores", "mjpeg", "cfhd", "ffv1", "utvideo"]
+
+
+# Resolve shows a sequence as one clip, e.g. 'plate.[1001-1100].exr'
+IMAGE_SEQUENCE_PATTERN = re.compile(
+    r"^(?P<head>.*)\[(?P<start>\d+)-(?P<end>\d+)\](?P<tail>.*)$"
+)
+
+
+@dataclass(frozen=True)
+class ImageSequence:
+    directory: str
+    head: str
+    tail: str
+    start: int
+    end: int
+    padding: int
+
+    @property
+    def frame_paths(self) -> list[str]:
+        """Paths of every frame in the sequence, in order"""
+        return [
+            os.path.join(self.directory, f"{self.head}{x:0{self.padding}d}{self.tail}")
+            for x in range(self.start, self.end + 1)
+        ]
+
+    @property
+    def name(self) -> str:
+        """Name without frame numbers, separators or extension"""
+        return self.head.rstrip("._- ") or os.path.basename(self.directory)
+
+
+def parse_image_sequence(file_path: str) -> ImageSequence | None:
+    """
+    Parse an image sequence from a Resolve clip's file path
+
+    Returns:
+        ImageSequence | None: The sequence's frame pattern and range,
+            None if not a sequence
+    """
+
+    directory, file_name = os.path.split(file_path)
+    match = IMAGE_SEQUENCE_PATTERN.match(file_name)
+    if not match:
+        return None
+
+    return ImageSequence(
+        directory=directory,
+        head=match["head"],
+        tail=match["tail"],
+        start=int(match["start"]),
+        end=int(match["end"]),
+        padding=len(match["start"]),
+    )
+
+
+@dataclass(frozen=True)
+class TimelineUsage:
+    track: int
+    record_start: int
+    record_end: int
+    source_start: int
+    source_end: int
+
+
+@dataclass(frozen=True)
+class Playhead:
+    frame: int
+    fps: float
+    track: int | None = None
+
+
 @dataclass(frozen=True)
 class SourceMetadata:
     clip_name: str
@@ -35,6 +124,19 @@ class SourceMetadata:
     proxy_media_path: str
     end_tc: str
     media_pool_id: str
+    usages: list[TimelineUsage] = field(default_factory=list)
+
+    @property
+    def sequence(self) -> ImageSequence | None:
+        """Frame pattern and range if the source is an image sequence"""
+        return parse_image_sequence(self.file_path)
+
+    @property
+    def probe_file_path(self) -> str:
+        """File to probe for stream info, a sequence's first frame"""
+        if self.sequence:
+            return self.sequence.frame_paths[0]
+        return self.file_path
 
 
 @dataclass(frozen=True)
@@ -43,6 +145,37 @@ class ProjectMetadata:
     timeline_name: str
 
 
+@dataclass(frozen=True)
+class ChunkMetadata:
+    index: int
+    count: int
+    start_frame: int
+    end_frame: int
+    fill: bool = False
+
+
+def get_draft_settings(settings: Settings) -> Settings:
+    """
+    Get settings to encode a draft proxy with
+
+    Drafts take the proxy settings with the draft codec and resolution.
+    They never encode additional presets.
+    """
+
+    ds = settings.drafts
+    proxy = settings.proxy.copy(
+        update=dict(
+            nickname=f"{settings.proxy.nickname} (draft)",
+            codec=ds.codec,
+            vertical_res=ds.vertical_res,
+            profile=ds.profile,
+            pix_fmt=ds.pix_fmt,
+            presets=[],
+        )
+    )
+    return settings.copy(update=dict(proxy=proxy))
+
+
 @dataclass(init=True, repr=True)
 class Job:
     def __init__(
@@ -50,11 +183,13 @@ class Job:
         project_metadata: ProjectMetadata,
         source_metadata: SourceMetadata,
         settings: Settings,
+        draft: bool = False,
     ):
         # Get data
         self.source = source_metadata
         self.project = project_metadata
-        self.settings = settings
+        self.draft = draft
+        self.settings = get_draft_settings(settings) if draft else settings
 
         # Dynamic values
         self.proxy_offline_status: bool = (
@@ -66,6 +201,24 @@ class Job:
         status = "OFFLINE" if self.is_offline else status
         return f"Job object: '{self.source.file_name}' - {status} - {self.output_file_path}"
 
+    def as_draft(self) -> "Job":
+        """A fast, low resolution draft of this job to link first"""
+        return Job(self.project, self.source, self.settings, draft=True)
+
+    @property
+    def timeline_position(self) -> tuple[float, int]:
+        """
+        Record frame and track of the source's first use on the timeline
+
+        Sources not used on the timeline sort last.
+        """
+
+        if not self.source.usages:
+            return float("inf"), 0
+
+        first = min(self.source.usages, key=lambda x: (x.record_start, x.track))
+        return first.record_start, first.track
+
     @cached_property
     def output_file_path(self) -> str:
         """
@@ -104,7 +257,7 @@ class Job:
 
             return str(try_path)
 
-        initial_output_path = os.path.join(self.output_directory, self.source.file_name)
+        initial_output_path = os.path.join(self.output_directory, self.proxy_file_name)
 
         if self.settings.proxy.overwrite:
             if not os.path.exists(initial_output_path):
@@ -123,6 +276,19 @@ class Job:
             )
             return initial_output_path
 
+    @property
+    def proxy_file_name(self) -> str:
+        """
+        File name of the proxy before any collision increments
+
+        Matches the source file name. Image sequences are encoded
+        to a single file named after the sequence.
+        """
+
+        if self.source.sequence:
+            return self.source.sequence.name + self.settings.proxy.ext
+        return self.source.file_name
+
     @property
     def output_file_name(self) -> str:
         """
@@ -133,9 +299,36 @@ class Job:
         """
         return os.path.splitext(os.path.basename(self.output_file_path))[0]
 
+    @property
+    def output_file_paths(self) -> dict[str, str]:
+        """
+        Output file paths of every proxy preset by nickname
+
+        The proxy preset's output comes first and is the only one
+        linked. Additional presets are written to their own subfolder
+        with their own extension, so they're never mistaken for linkable
+        proxies.
+
+        Returns:
+            dict[str, str]: Output file path by preset nickname
+        """
+        output_file_paths = {self.settings.proxy.nickname: self.output_file_path}
+        for preset in self.settings.proxy.presets:
+            output_file_paths[preset.nickname] = os.path.join(
+                self.output_directory,
+                preset.subfolder,
+                self.output_file_name + preset.ext,
+            )
+        return output_file_paths
+
     @property
     def output_directory(self):
-        """Get output proxy dir, mirroring source subfolder structure"""
+        """
+        Get output proxy dir, mirroring source subfolder structure
+
+        Drafts are written to their own subfolder,
+        so they're never mistaken for full quality proxies.
+        """
         file_path = self.source.file_path
         assert file_path
         p = pathlib.Path(file_path)
@@ -144,6 +337,7 @@ class Job:
             os.path.join(
                 self.settings.paths.proxy_root,
                 os.path.dirname(p.relative_to(*p.parts[:1])),
+                self.settings.drafts.subfolder if self.draft else "",
             )
         )
 
@@ -169,21 +363,21 @@ class Job:
         return self.proxy_offline_status
 
     @cached_property
-    def newest_linkable_proxy(self) -> str | None:
+    def linkable_proxies(self) -> list[str]:
         """
-        Return the newest linkable proxy for the current Job if any
+        Return all linkable proxies for the current Job, newest first
 
         Uses `linkable_proxy_suffix_regex` user setting to filter
         allowable file suffixes.
         """
 
-        logger.info("[cyan]Getting newest linkable proxy...")
+        logger.info("[cyan]Getting linkable proxies...")
 
-        # Get glob path
+        # Get glob path, escaping any glob characters in the file name
         glob_path = os.path.splitext(
             os.path.join(
-                self.output_directory,
-                self.source.file_name,
+                glob_escape(self.output_directory),
+                glob_escape(self.proxy_file_name),
             )
         )[0]
 
@@ -194,14 +388,14 @@ class Job:
             logger.debug(
                 f'[magenta] * No variants found at expected path:\n   "{glob_path}"'
             )
-            return
+            return []
 
         candidates = []
         for x in matches:
             logger.debug(f"[magenta] * Checking variant {x}")
 
             logger.debug("[magenta] * Checking for exact match")
-            if os.path.basename(x).upper() == self.source.file_name.upper():
+            if os.path.basename(x).upper() == self.proxy_file_name.upper():
                 logger.debug(f"[magenta] * Found exact match: '{os.path.basename(x)}'")
                 candidates.append(x)
                 continue
@@ -224,55 +418,335 @@ class Job:
                 else:
                     logger.debug("[yellow]   * Not found")
 
-        if not candidates:
+        if len(candidates) > 1:
+            candidates = sorted(candidates, key=os.path.getmtime, reverse=True)
+            logger.debug(
+                f"[magenta] * Newest match: '{os.path.basename(candidates[0])}'"
+            )
+
+        return [os.path.normpath(x) for x in candidates]
+
+    @property
+    def newest_linkable_proxy(self) -> str | None:
+        """Newest linkable proxy for the current Job, if any"""
+
+        if not self.linkable_proxies:
             return None
+        return self.linkable_proxies[0]
 
-        if len(candidates) == 1:
-            return os.path.normpath(candidates[0])
+    @cached_property
+    def derived_from(self) -> str | None:
+        """
+        An existing proxy to encode from instead of the source, if any
+
+        Decoding an intact, intraframe proxy at a higher resolution than
+        required is far cheaper than decoding camera originals, e.g.
+        lowering `vertical_res`. The lowest resolution suitable proxy is
+        chosen. Sources fit to remux aren't derived. Trim-aware proxies
+        are black outside the ranges they were used in, so they're never
+        derived from.
+
+        Returns:
+            str | None: Proxy to derive from, None to encode from source
+        """
+
+        if self.can_remux:
+            return None
+
+        logger.info("[cyan]Checking for proxies to derive from...")
+
+        derivable = []
+        for candidate in self.linkable_proxies:
+            if os.path.normpath(candidate) == os.path.normpath(self.output_file_path):
+                continue
+
+            height = self.get_derivable_height(candidate)
+            if height is not None:
+                derivable.append((height, candidate))
 
-        candidates = sorted(candidates, key=os.path.getmtime, reverse=True)
-        logger.debug(f"[magenta] * Newest match: '{os.path.basename(candidates[0])}'")
-        return os.path.normpath(candidates[0])
+        if not derivable:
+            return None
+
+        height, candidate = min(derivable)
+        logger.debug(
+            f"[magenta] * Deriving from {height}p proxy '{core.shorten_long_path(candidate)}'"
+        )
+        return candidate
+
+    def get_derivable_height(self, candidate: str) -> int | None:
+        """
+        Get the height of an existing proxy, if it's fit to derive from
+
+        Suitable proxies are intact, intraframe, untrimmed and above the
+        proxy preset's vertical resolution.
+
+        Returns:
+            int | None: The proxy's height, None if it isn't suitable
+        """
+
+        try:
+            video = ffmpeg.probe(candidate)
+        except Exception as e:
+            logger.debug(f"[magenta] * Couldn't probe '{candidate}': {e}")
+            return None
+
+        if video.codec not in INTRAFRAME_CODECS:
+            return None
+
+        if video.comment == TRIMMED_COMMENT:
+            logger.debug(f"[magenta] * Proxy '{candidate}' is trim-aware")
+            return None
+
+        if video.height <= int(self.settings.proxy.vertical_res):
+            return None
+
+        # Incomplete proxies are missing frames
+        if video.frames is not None:
+            intact = video.frames == self.source.frames
+        else:
+            duration = video.stream_duration or 0
+            intact = abs(duration - self.source.frames / self.source.fps) <= (
+                2 / self.source.fps
+            )
+
+        if not intact:
+            logger.debug(f"[magenta] * Proxy '{candidate}' looks incomplete")
+            return None
+
+        return video.height
+
+    @property
+    def input_file_path(self) -> str:
+        """Proxy to derive from if any, otherwise the source media"""
+        return self.derived_from or self.source.file_path
 
     @cached_property
+    def trim_ranges(self) -> list[tuple[int, int, bool]]:
+        """
+        Source frame ranges to encode in full or fill, if trim-aware
+
+        Ranges used on the timeline, plus handles, are encoded in full.
+        Unused ranges are filled with cheap black frames so the proxy
+        still matches the source's duration and links. Gaps too short to
+        be worth filling are encoded in full. Retimed clips may use more
+        source than their timeline duration, so handles are generous.
+
+        Returns:
+            list[tuple[int, int, bool]]: Start frame, end frame and
+                whether to fill, covering the whole source. Empty if
+                the job isn't trimmed.
+        """
+
+        ps = self.settings.proxy
+        frames = self.source.frames
+
+        # Image sequences have no audio to fill for
+        if not ps.trim_aware or not self.source.usages or self.source.sequence:
+            return []
+
+        handles = round(ps.trim_handles * self.source.fps)
+        min_gap = max(handles, round(self.source.fps))
+
+        used = sorted(
+            (max(0, x.source_start - handles), min(frames, x.source_end + handles))
+            for x in self.source.usages
+        )
+
+        merged: list[list[int]] = []
+        for start, end in used:
+            if merged and start - merged[-1][1] < min_gap:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        # Fill short leading and trailing gaps too
+        if merged[0][0] < min_gap:
+            merged[0][0] = 0
+        if frames - merged[-1][1] < min_gap:
+            merged[-1][1] = frames
+
+        if merged == [[0, frames]]:
+            return []
+
+        ranges, position = [], 0
+        for start, end in merged:
+            if start > position:
+                ranges.append((position, start, True))
+            ranges.append((start, end, False))
+            position = end
+        if position < frames:
+            ranges.append((position, frames, True))
+
+        logger.debug(
+            f"[magenta] * Trimming '{self.source.file_name}' to {len(merged)} used ranges"
+        )
+        return ranges
+
+    @cached_property
+    def chunks(self) -> list[ChunkMetadata]:
+        """
+        Time-range chunks to encode the source media in parallel
+
+        Source media shorter than the `duration_worth_chunking` setting
+        or fit to remux is not chunked. A short remainder is merged into
+        the last chunk so no worker is left with a sliver of a clip.
+        Trim-aware jobs are always chunked by used and filled ranges.
+
+        Returns:
+            list[ChunkMetadata]: Chunks in source order, if chunked
+        """
+
+        chunking = self.settings.chunking
+        if not self.source.fps or self.can_remux:
+            return []
+
+        ranges = self.trim_ranges
+        if not ranges:
+            if not chunking.enabled:
+                return []
+
+            if self.source.frames / self.source.fps < chunking.duration_worth_chunking:
+                return []
+
+            ranges = [(0, self.source.frames, False)]
+
+        chunk_frames = max(1, round(chunking.chunk_duration * self.source.fps))
+
+        spans = []
+        for start, end, fill in ranges:
+            # Fills are cheap, never split them
+            if fill or not chunking.enabled:
+                spans.append((start, end, fill))
+                continue
+
+            boundaries = list(range(start, end, chunk_frames))
+
+            # Merge short remainder into last chunk
+            if len(boundaries) > 1 and end - boundaries[-1] < chunk_frames / 2:
+                boundaries.pop()
+
+            boundaries.append(end)
+            spans.extend(
+                (boundaries[i], boundaries[i + 1], False)
+                for i in range(len(boundaries) - 1)
+            )
+
+        logger.debug(
+            f"[magenta] * Splitting '{self.source.file_name}' into {len(spans)} chunks"
+        )
+
+        return [
+            ChunkMetadata(
+                index=i,
+                count=len(spans),
+                start_frame=start,
+                end_frame=end,
+                fill=fill,
+            )
+            for i, (start, end, fill) in enumerate(spans)
+        ]
+
+    @cached_property
+    def probe_manifest(self) -> ffmpeg.ProbeManifest | None:
+        """
+        Source probe result, shipped so workers needn't probe
+
+        Cached so each source is only probed once per queue.
+        None if the source can't be probed.
+        """
+
+        try:
+            manifest = ffmpeg.get_probe_manifest(self.source.probe_file_path)
+        except Exception as e:
+            logger.warning(f"[yellow]Couldn't probe '{self.source.file_name}': {e}")
+            return None
+
+        logger.debug(f"[magenta] * Probed video stream: {manifest.result}")
+        return manifest
+
+    @property
+    def video_stream(self) -> ffmpeg.ProbeResult:
+        """Video stream info of the source media"""
+
+        assert self.probe_manifest is not None
+        return self.probe_manifest.result
+
+    @cached_property
+    def can_remux(self) -> bool:
+        """
+        Whether the source media already meets the proxy spec
+
+        Sources with a matching codec, profile and pixel format at or
+        below the proxy's vertical resolution can be stream copied
+        instead of re-encoded. Flips, full range levels, image sequences
+        and additional presets all need an encode.
+        """
+
+        ps = self.settings.proxy
+
+        if ps.presets or self.source.h_flip or self.source.v_flip:
+            return False
+
+        if self.source.sequence:
+            return False
+
+        if self.source_level != "in_range=limited":
+            return False
+
+        def normalise(value: str) -> str:
+            return str(value).strip().lower().replace(" ", "_")
+
+        stream = self.video_stream
+        checks = {
+            "codec": ENCODER_CODECS.get(ps.codec, ps.codec) == stream.codec,
+            "profile": normalise(ps.profile) == normalise(stream.profile),
+            "height": stream.height <= int(ps.vertical_res),
+            "pix_fmt": not ps.pix_fmt or ps.pix_fmt == stream.pix_fmt,
+        }
+        logger.debug(
+            f"[magenta] * Remux checks for '{self.source.file_name}': {checks}"
+        )
+
+        return all(checks.values())
+
+    @property
     def input_level(self) -> str:
+        """
+        Levels of the file actually encoded
+
+        Proxima always writes limited range proxies,
+        so derived jobs are limited range whatever the source.
+        """
+
+        if self.derived_from:
+            return "in_range=limited"
+        return self.source_level
+
+    @cached_property
+    def source_level(self) -> str:
         """
         Match Resolve's set data levels ("Auto", "Full" or "Video")
 
-        Uses ffprobe to probe file for levels if Resolve data levels are set to Auto.
+        Probes the file for levels if Resolve's data levels are Auto.
         """
 
         logger.info("[cyan]Getting input level...")
 
         def probe_for_input_range(self):
             """
-            Probe file with ffprobe for colour range
+            Probe file for colour range
             and map to ffmpeg 'in_range' value ("full" or "limited")
             """
 
-            input = self.source.file_path
-            streams = ffmpeg.ffprobe(file=input)["streams"]
-
-            # Get first valid video stream
-            video_info = None
-            for stream in streams:
-                logger.debug(
-                    f"[magenta] * Found stream '{stream.get('codec_long_name', 'Data stream')}'"
-                )
-                if stream["codec_type"] == "video":
-                    if stream["r_frame_rate"] != "0/0":
-                        video_info = stream
-            assert video_info is not None
-
-            color_data = {k: v for k, v in video_info.items() if "color" in k}
-            logger.debug(f"[magenta] * Color data: {color_data}")
+            color_range = self.video_stream.color_range
+            logger.debug(f"[magenta] * Color range: {color_range}")
 
-            if "color_range" in color_data.keys():
+            if color_range in ["pc", "tv"]:
                 switch = {
                     "pc": "in_range=full",
                     "tv": "in_range=limited",
                 }
-                return switch[video_info["color_range"]]
+                return switch[color_range]
 
             else:
                 logger.warning(